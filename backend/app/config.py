@@ -0,0 +1,144 @@
+import os
+
+# Local cache root shared by all on-disk cache tiers
+CACHE_DIR = os.getenv("SCRIBBL_CACHE_DIR", "/tmp/scribbl_cache")
+
+# PDF processing cache (keyed by SHA-256 of the uploaded file)
+PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+# Upload ingestion: uploads are streamed to disk in fixed-size chunks
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(200 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+
+# Outline map-reduce: concurrent per-chunk LLM calls
+OUTLINE_CONCURRENCY = int(os.getenv("OUTLINE_CONCURRENCY", "8"))
+OUTLINE_MAX_RETRIES = int(os.getenv("OUTLINE_MAX_RETRIES", "3"))
+# 0 disables fuzzy folding of near-duplicate outline entries (difflib ratio, 0-1)
+OUTLINE_FUZZY_THRESHOLD = float(os.getenv("OUTLINE_FUZZY_THRESHOLD", "0"))
+
+# LLM response cache (SQLite)
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(CACHE_DIR, "llm_cache.sqlite3"))
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Process-wide AsyncOpenAI client connection pool
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "64"))
+OPENAI_MAX_KEEPALIVE = int(os.getenv("OPENAI_MAX_KEEPALIVE", "32"))
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "60"))
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "120"))
+# Fresh (uncached) re-asks when a script/storyboard reply doesn't parse
+LLM_PARSE_RETRIES = int(os.getenv("LLM_PARSE_RETRIES", "1"))
+
+# Stream the storyboard and start sketch/TTS/render per scene as it arrives
+STORYBOARD_STREAMING = os.getenv("STORYBOARD_STREAMING", "1") == "1"
+
+# "two_pass" (script, then storyboard) or "fused" (one call straight to the storyboard)
+PIPELINE_MODES = ("two_pass", "fused")
+DEFAULT_PIPELINE_MODE = os.getenv("DEFAULT_PIPELINE_MODE", "two_pass")
+
+# Optional Redis for cross-process coordination (rate limits, status pub/sub)
+REDIS_URL = os.getenv("REDIS_URL")
+
+# Adaptive (AIMD) rate limit for Replicate image generation, requests/second
+SKETCH_RATE_INITIAL = float(os.getenv("SKETCH_RATE_INITIAL", "1.0"))
+SKETCH_RATE_MIN = float(os.getenv("SKETCH_RATE_MIN", "0.05"))
+SKETCH_RATE_MAX = float(os.getenv("SKETCH_RATE_MAX", "10.0"))
+SKETCH_RATE_STEP = float(os.getenv("SKETCH_RATE_STEP", "0.05"))
+SKETCH_RATE_BURST = float(os.getenv("SKETCH_RATE_BURST", "3"))
+
+# Sketch generation
+REPLICATE_BASE_URL = os.getenv("REPLICATE_BASE_URL", "https://api.replicate.com")
+SKETCH_CONCURRENCY = int(os.getenv("SKETCH_CONCURRENCY", "10"))
+SKETCH_POLL_INTERVAL = float(os.getenv("SKETCH_POLL_INTERVAL", "0.5"))
+SKETCH_POSTPROCESS_WORKERS = int(os.getenv("SKETCH_POSTPROCESS_WORKERS", str(os.cpu_count() or 1)))
+
+# Shared async HTTP client for downloads / storage
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "50"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "60"))
+
+# Sketch cache: exact prompt+params hits, plus optional near-duplicate reuse
+SKETCH_CACHE_MAX_BYTES = int(os.getenv("SKETCH_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+# Token Jaccard similarity (0-1) above which a cached sketch is reused; 0 disables
+SKETCH_SIMILARITY_THRESHOLD = float(os.getenv("SKETCH_SIMILARITY_THRESHOLD", "0"))
+
+# TTS audio cache, keyed by (model, voice, text)
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+# Also keep clips in the storage bucket (cache/tts/), shared across instances
+TTS_CACHE_REMOTE = os.getenv("TTS_CACHE_REMOTE", "0") == "1"
+
+# Scene motion: "pil" renders precomputed Ken Burns crops and pipes frames to ffmpeg,
+# "zoompan" uses ffmpeg's zoompan filter
+MOTION_BACKENDS = ("pil", "zoompan")
+MOTION_BACKEND = os.getenv("MOTION_BACKEND", "pil")
+
+# Render scheduler: each encode gets a fixed -threads budget; workers default to
+# cpu_count // RENDER_THREADS_PER_ENCODE (RENDER_WORKERS=0)
+RENDER_THREADS_PER_ENCODE = int(os.getenv("RENDER_THREADS_PER_ENCODE", "2"))
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "0"))
+
+# Render modes: "per_scene" encodes a clip per scene and concatenates them,
+# "single_pass" renders the whole video with one filter graph in one ffmpeg process
+RENDER_MODES = ("per_scene", "single_pass")
+DEFAULT_RENDER_MODE = os.getenv("DEFAULT_RENDER_MODE", "per_scene")
+
+# Rendered scene clip cache (keyed by sketch/audio bytes, text, motion, duration, encoder settings)
+CLIP_CACHE_MAX_BYTES = int(os.getenv("CLIP_CACHE_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+
+# Output: "mp4" publishes final.mp4 when done; "hls" also publishes a growing HLS playlist
+# as scenes finish (per_scene render mode only)
+OUTPUT_MODES = ("mp4", "hls")
+DEFAULT_OUTPUT_MODE = os.getenv("DEFAULT_OUTPUT_MODE", "mp4")
+HLS_SEGMENT_SECONDS = int(os.getenv("HLS_SEGMENT_SECONDS", "4"))
+# Attempts after the first before a scene's segments are given up on and the live stream ends
+HLS_SEGMENT_RETRIES = int(os.getenv("HLS_SEGMENT_RETRIES", "2"))
+
+# Encoder profiles. "final" is the published video; "draft" is a fast low-res preview
+# rendered first when a project asks for one (RENDER_PREVIEW sets the default)
+RENDER_PROFILES = {
+    "draft": {
+        "width": int(os.getenv("DRAFT_RENDER_WIDTH", "640")),
+        "height": int(os.getenv("DRAFT_RENDER_HEIGHT", "360")),
+        "fps": int(os.getenv("DRAFT_RENDER_FPS", "12")),
+        "preset": os.getenv("DRAFT_RENDER_PRESET", "ultrafast"),
+        "crf": int(os.getenv("DRAFT_RENDER_CRF", "32")),
+        "simple_motion": True,
+    },
+    "final": {
+        "width": int(os.getenv("FINAL_RENDER_WIDTH", "1280")),
+        "height": int(os.getenv("FINAL_RENDER_HEIGHT", "720")),
+        "fps": int(os.getenv("FINAL_RENDER_FPS", "25")),
+        "preset": os.getenv("FINAL_RENDER_PRESET", "ultrafast"),
+        "crf": int(os.getenv("FINAL_RENDER_CRF", "23")),
+        "simple_motion": False,
+    },
+}
+RENDER_PREVIEW = os.getenv("RENDER_PREVIEW", "0") == "1"
+
+# Extra output aspect ratios (width, height); "landscape" is the main 16:9 video
+OUTPUT_ASPECTS = {
+    "landscape": (16, 9),
+    "vertical": (9, 16),
+    "square": (1, 1),
+}
+
+# Storage: "supabase" (REST API) or "local" (filesystem stand-in for offline dev/benchmarks)
+STORAGE_BACKENDS = ("supabase", "local")
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "supabase")
+STORAGE_MAX_CONNECTIONS = int(os.getenv("STORAGE_MAX_CONNECTIONS", "32"))
+STORAGE_TIMEOUT = float(os.getenv("STORAGE_TIMEOUT", "120"))
+LOCAL_STORAGE_ROOT = os.getenv("LOCAL_STORAGE_ROOT", os.path.join(CACHE_DIR, "storage"))
+# Simulated per-request round trip for the local backend
+LOCAL_STORAGE_LATENCY_MS = float(os.getenv("LOCAL_STORAGE_LATENCY_MS", "0"))
+# Large files go through Supabase's S3 endpoint as concurrent multipart uploads (needs S3 keys)
+STORAGE_MULTIPART_THRESHOLD = int(os.getenv("STORAGE_MULTIPART_THRESHOLD", str(32 * 1024 * 1024)))
+STORAGE_PART_SIZE = int(os.getenv("STORAGE_PART_SIZE", str(8 * 1024 * 1024)))
+STORAGE_UPLOAD_CONCURRENCY = int(os.getenv("STORAGE_UPLOAD_CONCURRENCY", "8"))
+SUPABASE_S3_ACCESS_KEY_ID = os.getenv("SUPABASE_S3_ACCESS_KEY_ID")
+SUPABASE_S3_SECRET_ACCESS_KEY = os.getenv("SUPABASE_S3_SECRET_ACCESS_KEY")
+SUPABASE_S3_REGION = os.getenv("SUPABASE_S3_REGION", "us-east-1")
+
+# Live project status (in memory, or Redis when REDIS_URL is set - required with several
+# worker processes); storage only sees the initial "queued" and the terminal states
+STATUS_TTL_SECONDS = int(os.getenv("STATUS_TTL_SECONDS", str(24 * 3600)))
+STATUS_KEEPALIVE_SECONDS = float(os.getenv("STATUS_KEEPALIVE_SECONDS", "15"))
@@ -4,6 +4,12 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.routes import pdf, outline, storyboard, sketches, video, projects
+from app.utils.ai_client import llm_cache
+from app.services.sketch_engine import sketch_rate_limiter, sketch_cache
+from app.services.tts_engine import audio_cache
+from app.services.render_scheduler import render_scheduler
+from app.services.project_orchestrator import clip_cache
+from app.services.status_registry import status_registry
 
 
 app = FastAPI(title="SketchCourse Backend")
@@ -27,3 +33,16 @@ app.include_router(projects.router, prefix="/projects", tags=["projects"])
 @app.get("/")
 def root():
     return {"status": "SketchCourse backend running"}
+
+
+@app.get("/stats")
+def stats():
+    return {
+        "llm_cache": llm_cache.stats(),
+        "sketch_cache": sketch_cache.stats(),
+        "tts_cache": audio_cache.stats(),
+        "clip_cache": clip_cache.stats(),
+        "render_scheduler": render_scheduler.metrics(),
+        "sketch_limiter": sketch_rate_limiter.metrics(),
+        "status_registry": status_registry.metrics(),
+    }
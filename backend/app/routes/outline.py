@@ -14,5 +14,5 @@ async def generate_outline(payload: dict):
         return {"error": "chunks must be a list of strings"}
 
 
-    outline = generator.generate_outline(chunks)
+    outline = await generator.generate_outline_async(chunks)
     return {"outline": outline}
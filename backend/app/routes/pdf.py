@@ -1,37 +1,38 @@
 from fastapi import APIRouter, UploadFile, File
 import uuid
 import os
+import asyncio
 
 from app.services.storage import StorageManager
 from app.services.pdf_processor import PDFProcessor
+from app.services.pdf_cache import PDFCache
+from app.utils.uploads import spool_upload
 
 router = APIRouter()
 storage = StorageManager()
 processor = PDFProcessor()
+pdf_cache = PDFCache(storage)
 
 
 @router.post("/process")
 async def upload_and_process_pdf(file: UploadFile = File(...)):
-    # Save temp file
+    # Stream to a temp file (hashed on the way in); the storage upload reads this same file
     file_id = str(uuid.uuid4())
     tmp_path = f"/tmp/{file_id}.pdf"
+    sha256 = await spool_upload(file, tmp_path)
 
-    with open(tmp_path, "wb") as f:
-        content = await file.read()
-        f.write(content)
+    # Upload + process, or reuse a previous result for identical bytes
+    try:
+        entry, cache_hit = await asyncio.to_thread(pdf_cache.get_or_process, tmp_path, sha256, processor)
+    finally:
+        # Remove temp file
+        os.remove(tmp_path)
 
-    # Upload to Supabase
-    dest_path = f"uploads/pdf/{file_id}.pdf"
-    pdf_url = storage.upload_file(tmp_path, dest_path)
-
-    # Process PDF
-    processed = processor.process_pdf(tmp_path)
-
-    # Remove temp file
-    os.remove(tmp_path)
+    pdf_url = await storage.get_signed_url_async(entry["storage_path"])
 
     return {
-        "pdf_id": file_id,
+        "pdf_id": sha256,
         "pdf_url": pdf_url,
-        "processed": processed
+        "processed": entry["processed"],
+        "cache_hit": cache_hit
     }
@@ -1,36 +1,54 @@
-from fastapi import APIRouter, UploadFile, File, BackgroundTasks, HTTPException
+from fastapi import APIRouter, UploadFile, File, Form, BackgroundTasks, HTTPException
+from fastapi.responses import StreamingResponse
 import uuid
 import os
+import json
+import asyncio
 import shutil
+from app import config
 from app.services.project_orchestrator import ProjectOrchestrator
 
 from app.services.storage import StorageManager
+from app.services.status_registry import status_registry
+from app.utils.uploads import spool_upload
 
 router = APIRouter()
 orchestrator = ProjectOrchestrator()
 storage = StorageManager()
 
-async def run_pipeline_task(pdf_path: str, project_id: str):
-    status_path = f"projects/{project_id}/status.json"
-    
+async def run_pipeline_task(
+    pdf_path: str,
+    project_id: str,
+    pdf_sha256: str = None,
+    mode: str = None,
+    render_mode: str = None,
+    output_mode: str = None,
+    preview: bool = None,
+    aspects: list = None,
+):
+    # Extra fields (e.g. clip cache stats) stick around for later steps and the final status
+    extra_fields = {}
+
     try:
-        async def update_step(step):
-            # Read current to preserve other fields if needed, or just overwrite
-            status = {"id": project_id, "status": "processing", "step": step}
-            storage.save_json(status_path, status)
+        async def update_step(step, **extra):
+            extra_fields.update(extra)
+            # Live only: pushed to subscribers, not written to storage
+            await status_registry.update(project_id, {"status": "processing", "step": step, **extra_fields})
 
         # Run the pipeline
-        final_url = await orchestrator.process_project(pdf_path, project_id, update_step)
+        final_url = await orchestrator.process_project(
+            pdf_path, project_id, update_step, pdf_sha256=pdf_sha256, pipeline_mode=mode,
+            render_mode=render_mode, output_mode=output_mode, preview=preview, aspects=aspects
+        )
         
-        storage.save_json(status_path, {
-            "id": project_id,
-            "status": "completed", 
-            "video_url": final_url
+        await status_registry.update(project_id, {
+            "status": "completed",
+            "video_url": final_url,
+            **extra_fields
         })
     except Exception as e:
-        storage.save_json(status_path, {
-            "id": project_id,
-            "status": "failed", 
+        await status_registry.update(project_id, {
+            "status": "failed",
             "error": str(e)
         })
     finally:
@@ -39,26 +57,53 @@ async def run_pipeline_task(pdf_path: str, project_id: str):
             os.remove(pdf_path)
 
 @router.post("/create")
-async def create_project(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
+async def create_project(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    mode: str = Form(None),
+    render_mode: str = Form(None),
+    output_mode: str = Form(None),
+    preview: bool = Form(None),
+    aspects: str = Form(None)
+):
+    # mode: "two_pass" or "fused" (single LLM call for script + storyboard)
+    if mode and mode not in config.PIPELINE_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {config.PIPELINE_MODES}")
+    # render_mode: "per_scene" (clip per scene + concat) or "single_pass" (one encode)
+    if render_mode and render_mode not in config.RENDER_MODES:
+        raise HTTPException(status_code=400, detail=f"render_mode must be one of {config.RENDER_MODES}")
+    # output_mode: "mp4", or "hls" to also stream scenes as they finish (needs per_scene)
+    if output_mode and output_mode not in config.OUTPUT_MODES:
+        raise HTTPException(status_code=400, detail=f"output_mode must be one of {config.OUTPUT_MODES}")
+    if (output_mode or config.DEFAULT_OUTPUT_MODE) == "hls" and (render_mode or config.DEFAULT_RENDER_MODE) != "per_scene":
+        raise HTTPException(status_code=400, detail="output_mode 'hls' requires render_mode 'per_scene'")
+    # aspects: extra output aspect ratios, comma-separated (e.g. "vertical,square")
+    aspect_list = [a.strip() for a in aspects.split(",") if a.strip()] if aspects else []
+    for aspect in aspect_list:
+        if aspect not in config.OUTPUT_ASPECTS:
+            raise HTTPException(status_code=400, detail=f"aspects must be from {list(config.OUTPUT_ASPECTS)}")
+    if aspect_list and (render_mode or config.DEFAULT_RENDER_MODE) != "per_scene":
+        raise HTTPException(status_code=400, detail="aspects require render_mode 'per_scene'")
+
     project_id = str(uuid.uuid4())
     
-    # Save PDF locally
+    # Stream PDF to local disk
     tmp_path = f"/tmp/{project_id}.pdf"
-    with open(tmp_path, "wb") as f:
-        content = await file.read()
-        f.write(content)
+    pdf_sha256 = await spool_upload(file, tmp_path)
         
-    # Initialize status in Storage
-    status_path = f"projects/{project_id}/status.json"
-    storage.save_json(status_path, {"id": project_id, "status": "queued"})
+    # One durable write up front so the project is never unknown (to other workers, or
+    # after a restart); after that status.json is only written once the project finishes
+    await status_registry.update(project_id, {"status": "queued"}, persist=True)
     
     # Start background task
-    background_tasks.add_task(run_pipeline_task, tmp_path, project_id)
+    background_tasks.add_task(
+        run_pipeline_task, tmp_path, project_id, pdf_sha256, mode, render_mode, output_mode, preview, aspect_list
+    )
     
     return {"project_id": project_id, "status": "queued"}
 
 @router.get("/list")
-def list_projects(ids: str = None):
+async def list_projects(ids: str = None):
     """
     List projects. 
     If 'ids' param is provided (comma-separated), fetch their status JSONs.
@@ -67,32 +112,48 @@ def list_projects(ids: str = None):
         return []
 
     id_list = ids.split(",")
-    results = []
-    
-    # Fetch sequentially for now (or use thread pool if slow)
-    # Since it's usually < 10 items, sequential is acceptable for MVP
-    # but let's use a simple loop
-    for pid in id_list:
-        status = storage.get_json(f"projects/{pid}/status.json")
-        if status:
-            results.append(status)
-            
-    return results
+
+    # Live projects come from the registry; finished ones are fetched concurrently from storage
+    statuses = await asyncio.gather(*(status_registry.get(pid) for pid in id_list))
+    return [status for status in statuses if status]
 
 @router.get("/{project_id}/status")
-def get_status(project_id: str):
-    status = storage.get_json(f"projects/{project_id}/status.json")
+async def get_status(project_id: str):
+    status = await status_registry.get(project_id)
     if not status:
         raise HTTPException(status_code=404, detail="Project not found")
     return status
 
+@router.get("/{project_id}/events")
+async def project_events(project_id: str):
+    """
+    Server-Sent Events stream of the project's status: the current snapshot, then
+    every step change / scene progress update, ending with the completed or failed status.
+    """
+    if not await status_registry.get(project_id):
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    async def stream():
+        async for status in status_registry.subscribe(project_id, keepalive=config.STATUS_KEEPALIVE_SECONDS):
+            if status is None:
+                yield ": keepalive\n\n"
+            else:
+                yield f"data: {json.dumps(status)}\n\n"
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.delete("/{project_id}")
-def delete_project(project_id: str):
+async def delete_project(project_id: str):
     """
     Delete a project's status file.
     """
     try:
-        storage.delete_file(f"projects/{project_id}/status.json")
+        await storage.delete_file_async(f"projects/{project_id}/status.json")
+        await status_registry.forget(project_id)
         # Ideally we would delete the folder too, but Supabase Storage doesn't support folder deletion easily
         # For now, deleting the status file effectively "hides" it from the list
         return {"status": "deleted"}
@@ -1,9 +1,22 @@
+import os
+import asyncio
+from typing import Dict
 from fastapi import APIRouter
-from app.services.sketch_engine import SketchEngine
+from app.services.sketch_engine import SketchEngine, sketch_rate_limiter
 
 router = APIRouter()
 engine = SketchEngine()
 
+
+async def _public(sketch: Dict) -> Dict:
+    """Wait for the upload, then drop the server-local copy: API callers get the URL only."""
+    try:
+        return await engine.ensure_uploaded(sketch)
+    finally:
+        path = sketch.pop("path", None)
+        if path and os.path.exists(path):
+            os.remove(path)
+
 @router.post("/generate")
 async def generate_single(payload: dict):
     description = payload.get("description")
@@ -13,7 +26,8 @@ async def generate_single(payload: dict):
     if not description:
         return {"error": "Missing 'description'"}
 
-    result = engine.generate(description, accents, allow_text)
+    result = await engine.generate_async(description, accents, allow_text)
+    result = await _public(result)
     return {"sketch": result}
 
 
@@ -24,4 +38,10 @@ async def generate_batch(payload: dict):
         return {"error": "Missing 'items' array"}
 
     out = await engine.generate_batch(items)
-    return {"sketches": out}
+    out = await asyncio.gather(*(_public(s) for s in out))
+    return {"sketches": list(out)}
+
+
+@router.get("/limiter")
+def limiter_metrics():
+    return sketch_rate_limiter.metrics()
@@ -11,5 +11,5 @@ async def generate_storyboard_route(payload: dict):
     if not outline:
         return {"error": "No outline provided"}
 
-    storyboard = generator.generate_storyboard(outline)
+    storyboard = await generator.generate_storyboard(outline)
     return {"storyboard": storyboard}
@@ -0,0 +1,99 @@
+import os
+import json
+import hashlib
+import uuid
+from typing import Dict, Optional, Tuple
+
+from app import config
+from app.services.storage import StorageManager
+from app.utils.disk_cache import DiskLRUCache
+
+
+class AudioCache:
+    """
+    Content-addressed cache of TTS clips.
+
+    Entries are keyed by (model, voice, SHA-256 of the text) and hold the MP3 plus its
+    measured duration, so repeated lines ("Let's recap") and resumed projects skip TTS.
+
+    Tiers:
+    - local disk (size-bounded LRU; MP3s and small duration sidecars)
+    - storage bucket (cache/tts/{key}.mp3 + .json), when TTS_CACHE_REMOTE is set
+    """
+
+    def __init__(self, storage: Optional[StorageManager] = None, remote: bool = config.TTS_CACHE_REMOTE):
+        self.storage = storage or StorageManager()
+        self.remote = remote
+        root = os.path.join(config.CACHE_DIR, "tts")
+        self.local = DiskLRUCache(os.path.join(root, "audio"), config.TTS_CACHE_MAX_BYTES, suffix=".mp3")
+        self.meta = DiskLRUCache(os.path.join(root, "meta"), config.TTS_CACHE_MAX_BYTES // 100, suffix=".json")
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model: str, voice: str, text: str) -> str:
+        text_hash = hashlib.sha256(text.encode()).hexdigest()
+        return hashlib.sha256(f"{model}\0{voice}\0{text_hash}".encode()).hexdigest()
+
+    # -------------------------------------------------------------
+    # Lookup / Store
+    # -------------------------------------------------------------
+    def get(self, key: str) -> Optional[Tuple[str, Optional[float]]]:
+        """
+        Return (private local path, duration) for a cached clip, or None.
+        The returned file belongs to the caller (hard link where possible), so cache
+        eviction never pulls audio out from under a render.
+        """
+        path = self.local.checkout(key, f"/tmp/audio_{uuid.uuid4()}.mp3")
+        if path:
+            self.hits += 1
+            return path, self._duration(key)
+
+        if self.remote:
+            entry = self.storage.get_json(self._remote_path(key, ".json"))
+            if entry:
+                tmp_path = f"/tmp/audio_{uuid.uuid4()}.mp3"
+                try:
+                    self.storage.download_file(self._remote_path(key, ".mp3"), tmp_path)
+                except Exception as e:
+                    print(f"TTS cache download failed ({key[:12]}): {e}")
+                else:
+                    # Promote to the local tier
+                    self.local.put_file(key, tmp_path)
+                    self.meta.put_bytes(key, json.dumps(entry).encode())
+                    self.hits += 1
+                    return tmp_path, entry.get("duration")
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, src_path: str, duration: Optional[float]):
+        """Copy a freshly generated clip into the cache (the caller keeps src_path)."""
+        self.local.put_file(key, src_path)
+        entry = {"duration": duration}
+        self.meta.put_bytes(key, json.dumps(entry).encode())
+
+        if self.remote:
+            try:
+                self.storage.upload_file(src_path, self._remote_path(key, ".mp3"), upsert=True)
+                self.storage.save_json(self._remote_path(key, ".json"), entry)
+            except Exception as e:
+                print(f"TTS cache upload failed ({key[:12]}): {e}")
+
+    def _duration(self, key: str) -> Optional[float]:
+        path = self.meta.get(key)
+        if not path:
+            return None
+        with open(path, "r") as f:
+            return json.load(f).get("duration")
+
+    def _remote_path(self, key: str, suffix: str) -> str:
+        return f"cache/tts/{key}{suffix}"
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
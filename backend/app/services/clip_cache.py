@@ -0,0 +1,71 @@
+import os
+import json
+import uuid
+import hashlib
+from typing import Dict, Optional
+
+from app import config
+from app.services.scene_model import Scene
+from app.utils.disk_cache import DiskLRUCache
+
+
+def _hash_file(path: Optional[str]) -> str:
+    if not path or not os.path.exists(path):
+        return ""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class ClipCache:
+    """
+    Content-addressed cache of rendered scene clips.
+
+    A clip is keyed by the hash of (sketch bytes, audio bytes, overlay text, motion,
+    duration, encoder settings), so retried projects and projects where only some
+    scenes changed re-encode just the scenes whose inputs differ.
+    Clips live on local disk, evicted LRU by CLIP_CACHE_MAX_BYTES.
+    """
+
+    def __init__(self, root: str = os.path.join(config.CACHE_DIR, "clips"), max_bytes: int = config.CLIP_CACHE_MAX_BYTES):
+        self.local = DiskLRUCache(root, max_bytes, suffix=".mp4")
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(scene: Scene, encoder_settings: Dict) -> str:
+        payload = json.dumps(
+            {
+                "sketch": _hash_file(scene.sketch_path),
+                "audio": _hash_file(scene.audio_path),
+                "text": scene.text or "",
+                "motion": scene.motion,
+                "duration": scene.duration,
+                "audio_duration": scene.audio_duration,
+                "encoder": encoder_settings,
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return a private copy of the cached clip (the caller may delete it), or None."""
+        path = self.local.checkout(key, f"/tmp/scene_{uuid.uuid4()}.mp4")
+        if path:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return path
+
+    def put(self, key: str, clip_path: str):
+        self.local.put_file(key, clip_path)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,172 @@
+import os
+import math
+import shutil
+import asyncio
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+import ffmpeg
+
+from app import config
+from app.services.storage import StorageManager
+
+
+class HLSPublisher:
+    """
+    Progressive HLS output for one project.
+
+    Each finished scene clip is remuxed (no re-encode) into one or more MPEG-TS
+    segments, which are uploaded immediately. Scenes can finish in any order; the
+    playlist (EVENT type, signed segment URLs) is republished whenever the next scene
+    in storyboard order is ready, so playback can start after the first scene.
+    Scene boundaries get EXT-X-DISCONTINUITY, since every clip restarts its timestamps.
+    A scene whose segments still fail after retries would hold back every later one, so
+    live publishing stops instead: the playlist is ended and error says why.
+    """
+
+    def __init__(self, project_id: str, storage: Optional[StorageManager] = None):
+        self.project_id = project_id
+        self.storage = storage or StorageManager()
+        self.prefix = f"projects/{project_id}/hls"
+        self.playlist_path = f"{self.prefix}/index.m3u8"
+        self.segment_seconds = config.HLS_SEGMENT_SECONDS
+        # Segments are cut on the renderer's 2 s keyframes, so they never exceed this
+        self.target_duration = math.ceil(self.segment_seconds) + 1
+
+        self.workdir = tempfile.mkdtemp(prefix=f"hls_{project_id}_")
+        self._ready: Dict[int, List[Tuple[str, float]]] = {}  # scene index -> [(url, seconds)]
+        self._published = 0   # scenes already in the playlist
+        self._lock = asyncio.Lock()
+        self.playlist_url: Optional[str] = None
+        self.finished = False
+        self.error: Optional[str] = None  # Set once live publishing has been given up on
+
+    # -------------------------------------------------------------
+    # Segments
+    # -------------------------------------------------------------
+    def _segment(self, index: int, clip_path: str) -> List[Tuple[str, float]]:
+        """Remux a clip into TS segments and upload them. Returns [(signed url, seconds)]."""
+        out_dir = os.path.join(self.workdir, f"scene_{index:04d}")
+        os.makedirs(out_dir, exist_ok=True)
+        local_playlist = os.path.join(out_dir, "scene.m3u8")
+
+        (
+            ffmpeg
+            .input(clip_path)
+            .output(
+                local_playlist,
+                c='copy',
+                f='hls',
+                hls_time=self.segment_seconds,
+                hls_playlist_type='vod',
+                hls_segment_filename=os.path.join(out_dir, f"seg_{index:04d}_%03d.ts"),
+            )
+            .run(overwrite_output=True, quiet=True)
+        )
+
+        segments = []
+        duration = None
+        with open(local_playlist, "r") as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith("#EXTINF:"):
+                    duration = float(line[len("#EXTINF:"):].split(",")[0])
+                elif line and not line.startswith("#"):
+                    with open(os.path.join(out_dir, line), "rb") as seg:
+                        url = self.storage.upload_bytes(
+                            seg.read(), f"{self.prefix}/{line}", "video/mp2t", upsert=True
+                        )
+                    segments.append((url, duration))
+
+        shutil.rmtree(out_dir, ignore_errors=True)
+        return segments
+
+    async def add_scene(self, index: int, clip_path: str) -> bool:
+        """
+        Segment + upload a finished scene. Returns True if the playlist was republished.
+        Raises once the scene's retries are used up; the stream is stopped first.
+        """
+        retries = config.HLS_SEGMENT_RETRIES
+        for attempt in range(retries + 1):
+            if self.error:
+                return False
+            try:
+                segments = await asyncio.to_thread(self._segment, index, clip_path)
+                break
+            except Exception as e:
+                if attempt == retries:
+                    await self._stop(f"scene {index + 1}: {e}")
+                    raise Exception(f"HLS segments failed for scene {index + 1} after {attempt+1} attempts: {e}")
+                delay = 2 ** attempt
+                print(f"[{self.project_id}] HLS error on scene {index + 1}: {e}. Retrying in {delay}s...")
+                await asyncio.sleep(delay)
+
+        async with self._lock:
+            if self.error:
+                return False
+            self._ready[index] = segments
+            if self._published not in self._ready:
+                return False
+            while self._published in self._ready:
+                self._published += 1
+            await asyncio.to_thread(self._publish, False)
+            return True
+
+    async def _stop(self, reason: str):
+        """Give up on live publishing: end the playlist at the last published scene."""
+        async with self._lock:
+            if self.error:
+                return
+            self.error = reason
+            if self.playlist_url:
+                try:
+                    await asyncio.to_thread(self._publish, True)
+                except Exception as e:
+                    # finish() tries again
+                    print(f"[{self.project_id}] Failed to end HLS playlist: {e}")
+
+    async def finish(self):
+        """
+        End the playlist (EXT-X-ENDLIST, so players stop polling) and clean up. Also
+        used when the project fails: the playlist then ends after the last published
+        scene. Safe to call more than once.
+        """
+        if self.finished:
+            return
+        self.finished = True
+        try:
+            async with self._lock:
+                if self.playlist_url:
+                    await asyncio.to_thread(self._publish, True)
+        finally:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+
+    # -------------------------------------------------------------
+    # Playlist
+    # -------------------------------------------------------------
+    def _render_playlist(self, ended: bool) -> str:
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            "#EXT-X-PLAYLIST-TYPE:EVENT",
+            f"#EXT-X-TARGETDURATION:{self.target_duration}",
+            "#EXT-X-MEDIA-SEQUENCE:0",
+        ]
+        for index in range(self._published):
+            if index > 0:
+                lines.append("#EXT-X-DISCONTINUITY")
+            for url, seconds in self._ready[index]:
+                lines.append(f"#EXTINF:{seconds:.3f},")
+                lines.append(url)
+        if ended:
+            lines.append("#EXT-X-ENDLIST")
+        return "\n".join(lines) + "\n"
+
+    def _publish(self, ended: bool):
+        self.playlist_url = self.storage.upload_bytes(
+            self._render_playlist(ended).encode(),
+            self.playlist_path,
+            "application/vnd.apple.mpegurl",
+            upsert=True,
+            cache_control="0",  # Players re-fetch the growing playlist
+        )
@@ -0,0 +1,138 @@
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+from PIL import Image
+
+
+@dataclass(frozen=True)
+class Motion:
+    """
+    A Ken Burns move: zoom from zoom_start to zoom_end while the crop window travels
+    from focus_start to focus_end. Focus is the window position within the free
+    margin (0 = left/top edge, 1 = right/bottom edge), so the crop never leaves the image.
+    """
+    zoom_start: float
+    zoom_end: float
+    focus_start: tuple = (0.5, 0.5)
+    focus_end: tuple = (0.5, 0.5)
+
+
+MOTIONS: Dict[str, Motion] = {
+    "static": Motion(1.0, 1.0),
+    "zoom_in": Motion(1.0, 1.3),
+    "zoom_out": Motion(1.3, 1.0),
+    "pan_left": Motion(1.2, 1.2, (1.0, 0.5), (0.0, 0.5)),
+    "pan_right": Motion(1.2, 1.2, (0.0, 0.5), (1.0, 0.5)),
+    "pan_up": Motion(1.2, 1.2, (0.5, 1.0), (0.5, 0.0)),
+    "pan_down": Motion(1.2, 1.2, (0.5, 0.0), (0.5, 1.0)),
+}
+
+# Order in which consecutive scenes get their motion, so neighbours differ
+MOTION_CYCLE = ["zoom_in", "pan_right", "zoom_out", "pan_left", "pan_down", "pan_up"]
+
+
+def motion_for_scene(index: int, requested: Optional[str] = None) -> str:
+    """A storyboard-requested motion if it is known, else the next one in the cycle."""
+    if requested in MOTIONS:
+        return requested
+    return MOTION_CYCLE[index % len(MOTION_CYCLE)]
+
+
+def fit_size(src_size: tuple, out_size: tuple) -> tuple:
+    """
+    Largest even size with the source's aspect ratio that fits out_size. Sketches are
+    pillarboxed into the output (white bars), never cropped to its aspect, so labels
+    near the edges stay visible.
+    """
+    src_w, src_h = src_size
+    out_w, out_h = out_size
+    scale = min(out_w / src_w, out_h / src_h)
+    return max(2, int(src_w * scale) // 2 * 2), max(2, int(src_h * scale) // 2 * 2)
+
+
+def source_size(path: str) -> tuple:
+    with Image.open(path) as img:
+        return img.size
+
+
+def crop_boxes(motion: str, src_size: tuple, n_frames: int) -> np.ndarray:
+    """
+    Crop rectangles (left, top, right, bottom) for every frame, computed up front.
+
+    The base window is the whole source (so "static" shows the full sketch); zoom
+    shrinks it and focus places it, with smoothstep easing.
+    Boxes are float (sub-pixel), which keeps slow moves free of jitter.
+    """
+    spec = MOTIONS.get(motion, MOTIONS["static"])
+    src_w, src_h = src_size
+    base_w, base_h = float(src_w), float(src_h)
+
+    t = np.linspace(0.0, 1.0, n_frames) if n_frames > 1 else np.zeros(1)
+    ease = t * t * (3 - 2 * t)
+
+    zoom = spec.zoom_start + (spec.zoom_end - spec.zoom_start) * ease
+    width = base_w / np.maximum(zoom, 1.0)
+    height = base_h / np.maximum(zoom, 1.0)
+
+    fx = spec.focus_start[0] + (spec.focus_end[0] - spec.focus_start[0]) * ease
+    fy = spec.focus_start[1] + (spec.focus_end[1] - spec.focus_start[1]) * ease
+    left = np.clip((src_w - width) * fx, 0, src_w - width)
+    top = np.clip((src_h - height) * fy, 0, src_h - height)
+
+    return np.stack([left, top, left + width, top + height], axis=1)
+
+
+def render_frames(sketch_path: str, motion: str, duration: float, fps: int, out_size: tuple) -> Iterator[bytes]:
+    """
+    Yield raw RGB24 frames for a scene: the sketch is decoded once, and each frame is
+    a single resample of its crop box (PIL resize with box=), pillarboxed to out_size.
+    """
+    img = Image.open(sketch_path).convert("RGB")
+    img.load()
+
+    n_frames = max(1, int(round(duration * fps)))
+    boxes = crop_boxes(motion, img.size, n_frames)
+
+    inner = fit_size(img.size, out_size)
+    canvas = None
+    if inner != tuple(out_size):
+        # White bars match the sketch background; only the inner area changes per frame
+        canvas = np.full((out_size[1], out_size[0], 3), 255, dtype=np.uint8)
+        x0 = (out_size[0] - inner[0]) // 2
+        y0 = (out_size[1] - inner[1]) // 2
+        area = canvas[y0:y0 + inner[1], x0:x0 + inner[0]]
+
+    last_box = None
+    last_frame = None
+    for box in boxes:
+        box = tuple(float(v) for v in box)
+        if box != last_box:
+            # Static scenes (and eased ends) repeat boxes; don't resample those twice
+            frame = img.resize(inner, Image.BILINEAR, box=box)
+            if canvas is None:
+                last_frame = frame.tobytes()
+            else:
+                area[...] = np.asarray(frame)
+                last_frame = canvas.tobytes()
+            last_box = box
+        yield last_frame
+
+
+def zoompan_args(motion: str, n_frames: int) -> Dict[str, str]:
+    """
+    zoompan z/x/y expressions for the same named motion (legacy backend).
+    Positions are fractions of the free margin, so pans stay inside the frame.
+    Render at fit_size() and pad to the output to get the pil backend's framing.
+    """
+    spec = MOTIONS.get(motion, MOTIONS["static"])
+    progress = f"(on/{max(n_frames - 1, 1)})"
+
+    def lerp(a: float, b: float) -> str:
+        return f"({a}+({b - a})*{progress})"
+
+    return {
+        "z": lerp(spec.zoom_start, spec.zoom_end),
+        "x": f"(iw-iw/zoom)*{lerp(spec.focus_start[0], spec.focus_end[0])}",
+        "y": f"(ih-ih/zoom)*{lerp(spec.focus_start[1], spec.focus_end[1])}",
+    }
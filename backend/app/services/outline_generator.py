@@ -1,13 +1,18 @@
-import os
 import json
-from typing import List, Dict
-from openai import OpenAI
+import asyncio
+from typing import List, Dict, Optional
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from app import config
+from app.services.outline_merger import OutlineMerger
+from app.utils.ai_client import chat_completion
 
 class OutlineGenerator:
 
-    def _generate_outline_for_chunk(self, text: str) -> Dict:
+    def __init__(self, llm_client=None):
+        # None -> the shared process-wide AsyncOpenAI client
+        self.client = llm_client
+
+    async def _generate_outline_for_chunk(self, text: str, use_cache: bool = True) -> Dict:
         SYSTEM_MSG = """
         You are a senior curriculum designer. Extract structured educational metadata
         from this chunk of text.
@@ -26,18 +31,21 @@ class OutlineGenerator:
 
         USER_MSG = f"Extract outline components from this text:\n\n{text[:15000]}"
 
-        response = client.chat.completions.create(
+        return await chat_completion(
+            self.client,
             model="gpt-4o",
             response_format={"type": "json_object"},
             messages=[
                 {"role": "system", "content": SYSTEM_MSG},
                 {"role": "user", "content": USER_MSG}
             ],
-            temperature=0.1
+            temperature=0.1,
+            use_cache=use_cache,
+            parse=self._parse_outline
         )
 
-        raw = response.choices[0].message.content
-
+    @staticmethod
+    def _parse_outline(raw: str) -> Dict:
         try:
             return json.loads(raw)
         except:
@@ -45,43 +53,14 @@ class OutlineGenerator:
             return json.loads(json_str)
 
 
-    def _merge_outlines(self, outlines: List[Dict]) -> Dict:
-        merged = {
-            "topics": [],
-            "subtopics": {},
-            "key_concepts": [],
-            "definitions": {}
-        }
-
+    def _merge_outlines(self, outlines: List[Dict], fuzzy_threshold: Optional[float] = None) -> Dict:
+        merger = OutlineMerger(config.OUTLINE_FUZZY_THRESHOLD if fuzzy_threshold is None else fuzzy_threshold)
         for o in outlines:
-            # merge topics
-            for t in o["topics"]:
-                if t not in merged["topics"]:
-                    merged["topics"].append(t)
-
-            # merge subtopics
-            for topic, subs in o.get("subtopics", {}).items():
-                if topic not in merged["subtopics"]:
-                    merged["subtopics"][topic] = []
-
-                for s in subs:
-                    if s not in merged["subtopics"][topic]:
-                        merged["subtopics"][topic].append(s)
-
-            # merge key concepts
-            for k in o["key_concepts"]:
-                if k not in merged["key_concepts"]:
-                    merged["key_concepts"].append(k)
-
-            # merge definitions
-            for term, definition in o["definitions"].items():
-                if term not in merged["definitions"]:
-                    merged["definitions"][term] = definition
-
-        return merged
+            merger.add(o)
+        return merger.result()
 
 
-    def _generate_global_order(self, merged: Dict) -> List[str]:
+    async def _generate_global_order(self, merged: Dict, use_cache: bool = True) -> List[str]:
         SYSTEM_MSG = """
         You are an expert educator. Based on the topics extracted, produce a logical
         teaching order that progresses from beginner → intermediate → advanced.
@@ -92,27 +71,68 @@ class OutlineGenerator:
 
         USER_MSG = f"Topics: {merged['topics']}"
 
-        response = client.chat.completions.create(
+        return await chat_completion(
+            self.client,
             model="gpt-4o",
             response_format={"type": "json_object"},
             messages=[
                 {"role": "system", "content": SYSTEM_MSG},
                 {"role": "user", "content": USER_MSG}
             ],
-            temperature=0.2
+            temperature=0.2,
+            use_cache=use_cache,
+            parse=lambda raw: json.loads(raw)["order"]
         )
 
-        raw = response.choices[0].message.content
-        return json.loads(raw)["order"]
-
-
-    def generate_outline(self, chunks: List[str]) -> Dict:
-        per_chunk_outlines = [
-            self._generate_outline_for_chunk(chunk) 
-            for chunk in chunks
-        ]
 
-        merged = self._merge_outlines(per_chunk_outlines)
-        merged["suggested_order"] = self._generate_global_order(merged)
+    async def generate_outline_async(
+        self,
+        chunks: List[str],
+        concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        use_cache: bool = True,
+    ) -> Dict:
+        """
+        Map-reduce outline generation.
+        Chunks are extracted concurrently (bounded by `concurrency`), each with its own
+        retries, and folded into the merge in chunk order as soon as every earlier
+        chunk has finished. Retries always bypass the LLM cache.
+        """
+        concurrency = concurrency or config.OUTLINE_CONCURRENCY
+        max_retries = config.OUTLINE_MAX_RETRIES if max_retries is None else max_retries
+
+        sem = asyncio.Semaphore(concurrency)
+
+        merger = OutlineMerger(config.OUTLINE_FUZZY_THRESHOLD)
+        finished: Dict[int, Dict] = {}
+        next_to_merge = 0
+
+        def fold_ready():
+            nonlocal next_to_merge
+            while next_to_merge in finished:
+                merger.add(finished.pop(next_to_merge))
+                next_to_merge += 1
+
+        async def run_chunk(index: int, chunk: str):
+            async with sem:
+                for attempt in range(max_retries + 1):
+                    try:
+                        outline = await self._generate_outline_for_chunk(chunk, use_cache and attempt == 0)
+                    except Exception as e:
+                        if attempt == max_retries:
+                            raise Exception(f"Outline failed for chunk {index} after {attempt+1} attempts: {e}")
+                        delay = 2 ** attempt
+                        print(f"Outline error on chunk {index}: {e}. Retrying in {delay}s...")
+                        await asyncio.sleep(delay)
+                        continue
+
+                    finished[index] = outline
+                    fold_ready()
+                    return
+
+        await asyncio.gather(*(run_chunk(i, chunk) for i, chunk in enumerate(chunks)))
+
+        merged = merger.result()
+        merged["suggested_order"] = await self._generate_global_order(merged, use_cache)
 
         return merged
@@ -0,0 +1,151 @@
+import re
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Tuple
+
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_DIGITS_RE = re.compile(r"\d+")
+
+
+def normalise_key(value: str) -> str:
+    """Case-, whitespace- and punctuation-insensitive key for an outline entry."""
+    value = _PUNCT_RE.sub(" ", str(value).lower())
+    return " ".join(value.split())
+
+
+class FoldedSet:
+    """
+    Insertion-ordered set of strings keyed by normalise_key.
+    The first spelling seen is kept for display.
+
+    With a fuzzy_threshold, keys that don't match exactly are compared (difflib ratio)
+    against existing keys sharing the same 3-character prefix and the same numbers
+    (so "Chapter 1" never folds into "Chapter 2"), and folded into the first one at or
+    above the threshold. Folded spellings are remembered as aliases, so repeats stay O(1).
+    """
+
+    def __init__(self, fuzzy_threshold: Optional[float] = None):
+        self.fuzzy_threshold = fuzzy_threshold
+        self.items: Dict[str, str] = {}       # canonical key -> display value
+        self._aliases: Dict[str, str] = {}    # folded key -> canonical key
+        self._buckets: Dict[Tuple[str, Tuple[str, ...]], List[str]] = {}
+
+    def add(self, value: str) -> Optional[str]:
+        """Add a value and return its canonical key (None for blank values)."""
+        key = normalise_key(value)
+        if not key:
+            return None
+
+        if key in self.items:
+            return key
+        if key in self._aliases:
+            return self._aliases[key]
+
+        if self.fuzzy_threshold:
+            match = self._fuzzy_match(key)
+            if match:
+                self._aliases[key] = match
+                return match
+            self._buckets.setdefault(self._bucket(key), []).append(key)
+
+        self.items[key] = str(value).strip()
+        return key
+
+    def find(self, value: str) -> Optional[str]:
+        """Canonical key value would fold into, without adding it (None if it would be new)."""
+        key = normalise_key(value)
+        if not key:
+            return None
+        if key in self.items:
+            return key
+        if key in self._aliases:
+            return self._aliases[key]
+        if self.fuzzy_threshold:
+            return self._fuzzy_match(key)
+        return None
+
+    @staticmethod
+    def _bucket(key: str) -> Tuple[str, Tuple[str, ...]]:
+        return key[:3], tuple(_DIGITS_RE.findall(key))
+
+    def _fuzzy_match(self, key: str) -> Optional[str]:
+        for candidate in self._buckets.get(self._bucket(key), ()):
+            matcher = SequenceMatcher(None, key, candidate)
+            # quick_ratio is a cheap upper bound on ratio
+            if matcher.quick_ratio() >= self.fuzzy_threshold and matcher.ratio() >= self.fuzzy_threshold:
+                return candidate
+        return None
+
+    def values(self) -> List[str]:
+        return list(self.items.values())
+
+
+class OutlineMerger:
+    """
+    Incremental, order-preserving merge of per-chunk outlines.
+    Call add() as chunk outlines arrive (in chunk order) and result() at any point.
+    """
+
+    def __init__(self, fuzzy_threshold: Optional[float] = None):
+        self.fuzzy_threshold = fuzzy_threshold
+        self.topics = FoldedSet(fuzzy_threshold)
+        self.key_concepts = FoldedSet(fuzzy_threshold)
+        self.terms = FoldedSet(fuzzy_threshold)
+        self.definitions: Dict[str, str] = {}
+        self.subtopics: Dict[str, FoldedSet] = {}  # heading key -> subtopics
+        # Headings as first seen; result() resolves them through topics (a topic can turn
+        # up in a later chunk), so only headings that never appear as topics keep these keys
+        self._headings = FoldedSet(fuzzy_threshold)
+
+    def add(self, outline: Dict):
+        for t in outline.get("topics", []):
+            self.topics.add(t)
+
+        for topic, subs in outline.get("subtopics", {}).items():
+            key = self._headings.add(topic)
+            if key is None:
+                continue
+            folded = self.subtopics.setdefault(key, FoldedSet(self.fuzzy_threshold))
+            for s in subs:
+                folded.add(s)
+
+        for k in outline.get("key_concepts", []):
+            self.key_concepts.add(k)
+
+        for term, definition in outline.get("definitions", {}).items():
+            key = self.terms.add(term)
+            if key is not None and key not in self.definitions:
+                self.definitions[key] = definition
+
+    def _merged_subtopics(self) -> Dict[str, List[str]]:
+        """Subtopics under the matching topic's key and spelling, else the heading's own."""
+        grouped: Dict[str, List[FoldedSet]] = {}
+        for key, subs in self.subtopics.items():
+            heading = self._headings.items[key]
+            topic_key = self.topics.find(heading)
+            if topic_key is not None:
+                heading = self.topics.items[topic_key]
+            grouped.setdefault(heading, []).append(subs)
+
+        merged = {}
+        for heading, sets in grouped.items():
+            if len(sets) == 1:
+                merged[heading] = sets[0].values()
+                continue
+            # Several headings folded into one topic
+            combined = FoldedSet(self.fuzzy_threshold)
+            for subs in sets:
+                for s in subs.values():
+                    combined.add(s)
+            merged[heading] = combined.values()
+        return merged
+
+    def result(self) -> Dict:
+        return {
+            "topics": self.topics.values(),
+            "subtopics": self._merged_subtopics(),
+            "key_concepts": self.key_concepts.values(),
+            "definitions": {
+                self.terms.items[key]: definition
+                for key, definition in self.definitions.items()
+            },
+        }
@@ -0,0 +1,79 @@
+import os
+import json
+import hashlib
+from typing import Dict, Optional, Tuple
+
+from app import config
+from app.services.pdf_processor import PDFProcessor
+from app.services.storage import StorageManager
+from app.utils.disk_cache import DiskLRUCache
+
+
+class PDFCache:
+    """
+    Content-addressed cache of PDF processing results.
+
+    Entries are keyed by the SHA-256 of the uploaded bytes and hold the processed
+    text/sections/chunks plus the storage path of the uploaded PDF, so repeat uploads
+    skip both extraction and the duplicate upload.
+
+    Tiers:
+    - local disk (size-bounded LRU)
+    - storage bucket (cache/pdf/{sha}.json)
+    """
+
+    def __init__(self, storage: Optional[StorageManager] = None):
+        self.storage = storage or StorageManager()
+        self.local = DiskLRUCache(
+            os.path.join(config.CACHE_DIR, "pdf"),
+            config.PDF_CACHE_MAX_BYTES,
+            suffix=".json",
+        )
+
+    @staticmethod
+    def hash_file(path: str) -> str:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(block)
+        return h.hexdigest()
+
+    def get(self, sha256: str) -> Optional[Dict]:
+        path = self.local.get(sha256)
+        if path:
+            with open(path, "r") as f:
+                return json.load(f)
+
+        entry = self.storage.get_json(self._remote_path(sha256))
+        if entry:
+            # Promote to the local tier
+            self.local.put_bytes(sha256, json.dumps(entry).encode())
+        return entry
+
+    def put(self, sha256: str, entry: Dict):
+        data = json.dumps(entry).encode()
+        self.local.put_bytes(sha256, data)
+        self.storage.save_json(self._remote_path(sha256), entry)
+
+    def get_or_process(self, pdf_path: str, sha256: str, processor: PDFProcessor) -> Tuple[Dict, bool]:
+        """
+        Return (entry, cache_hit). On a miss the PDF is uploaded to its
+        content-addressed location, processed, and the result cached.
+        """
+        entry = self.get(sha256)
+        if entry:
+            return entry, True
+
+        storage_path = f"uploads/pdf/{sha256}.pdf"
+        self.storage.upload_file(pdf_path, storage_path, upsert=True)
+
+        entry = {
+            "sha256": sha256,
+            "storage_path": storage_path,
+            "processed": processor.process_pdf(pdf_path),
+        }
+        self.put(sha256, entry)
+        return entry, False
+
+    def _remote_path(self, sha256: str) -> str:
+        return f"cache/pdf/{sha256}.json"
@@ -1,17 +1,65 @@
+import os
 import re
-from typing import List, Dict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional
 import PyPDF2
 
+# Below this many pages the process pool costs more than it saves
+PARALLEL_MIN_PAGES = 32
+PAGES_PER_TASK = 16
+
+
+def _extract_page_range(pdf_path: str, start: int, end: int) -> List[str]:
+    """Worker: extract text for pages [start, end) with a reader local to the process."""
+    with open(pdf_path, "rb") as f:
+        reader = PyPDF2.PdfReader(f)
+        return [(reader.pages[i].extract_text() or "") for i in range(start, end)]
+
+
 class PDFProcessor:
 
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    def count_pages(self, pdf_path: str) -> int:
+        with open(pdf_path, "rb") as f:
+            return len(PyPDF2.PdfReader(f).pages)
+
+    def iter_pages(self, pdf_path: str) -> Iterator[str]:
+        """
+        Yield page text in page order.
+        Large documents are split into page ranges and extracted on a process pool;
+        at most a couple of ranges per worker are in flight so memory stays bounded.
+        """
+        num_pages = self.count_pages(pdf_path)
+
+        if self.max_workers <= 1 or num_pages < PARALLEL_MIN_PAGES:
+            yield from _extract_page_range(pdf_path, 0, num_pages)
+            return
+
+        ranges = [
+            (start, min(start + PAGES_PER_TASK, num_pages))
+            for start in range(0, num_pages, PAGES_PER_TASK)
+        ]
+        window = self.max_workers * 2
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+            pending = []
+            next_range = 0
+
+            while next_range < len(ranges) or pending:
+                while next_range < len(ranges) and len(pending) < window:
+                    start, end = ranges[next_range]
+                    pending.append(pool.submit(_extract_page_range, pdf_path, start, end))
+                    next_range += 1
+
+                # Results are consumed strictly in submission order
+                for text in pending.pop(0).result():
+                    yield text
+
     def extract_text(self, pdf_path: str) -> str:
         """Extract raw text from a PDF file."""
-        text = ""
-        with open(pdf_path, "rb") as f:
-            reader = PyPDF2.PdfReader(f)
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-        return text
+        return "".join(f"{page}\n" for page in self.iter_pages(pdf_path))
 
     def clean_text(self, text: str) -> str:
         """Normalize and clean PDF text for processing."""
@@ -23,54 +71,70 @@ class PDFProcessor:
 
     def detect_sections(self, text: str) -> List[Dict]:
         """Very basic header detection based on capitalization and spacing."""
-        lines = text.split("\n")
         sections = []
         current_title = "Introduction"
-        current_text = ""
+        current_text = []
 
-        for line in lines:
+        for line in text.split("\n"):
             # simple heuristic for section headers
             if line.strip().isupper() and len(line.split(" ")) < 10:
                 # save previous section
                 if current_text:
-                    sections.append({"title": current_title, "text": current_text})
+                    sections.append({"title": current_title, "text": "".join(current_text)})
                 current_title = line.strip().title()
-                current_text = ""
+                current_text = []
             else:
-                current_text += line + " "
+                current_text.append(line + " ")
 
         if current_text:
-            sections.append({"title": current_title, "text": current_text})
+            sections.append({"title": current_title, "text": "".join(current_text)})
 
         return sections
 
-    def chunk_text(self, text: str, max_tokens: int = 1200) -> List[str]:
-        """Chunk text into LLM-sized segments."""
-        words = text.split(" ")
-        chunks = []
+    def iter_chunks(self, words: Iterable[str], max_tokens: int = 1200) -> Iterator[str]:
+        """Group a stream of words into LLM-sized segments."""
         current = []
 
         for w in words:
             current.append(w)
             # rough token approximation: 1 token ~ 0.75 words
             if len(current) > max_tokens * 0.75:
-                chunks.append(" ".join(current))
+                yield " ".join(current)
                 current = []
 
         if current:
-            chunks.append(" ".join(current))
+            yield " ".join(current)
 
-        return chunks
+    def chunk_text(self, text: str, max_tokens: int = 1200) -> List[str]:
+        """Chunk text into LLM-sized segments."""
+        return list(self.iter_chunks(text.split(" "), max_tokens))
 
     def process_pdf(self, pdf_path: str):
-        """Full pipeline — extract, clean, detect sections, chunk text."""
-        raw = self.extract_text(pdf_path)
-        cleaned = self.clean_text(raw)
-        sections = self.detect_sections(cleaned)
-        chunks = self.chunk_text(cleaned)
+        """
+        Full pipeline — extract, clean, detect sections, chunk text.
+        Pages are cleaned and chunked as they stream out of the extractor, so the
+        raw document text is never materialised.
+        """
+        cleaned_pages = []
+
+        def words():
+            for page in self.iter_pages(pdf_path):
+                cleaned = self.clean_text(page)
+                if cleaned:
+                    cleaned_pages.append(cleaned)
+                    yield from cleaned.split(" ")
+
+        chunks = list(self.iter_chunks(words()))
+
+        # Cleaning collapses newlines, so joining the cleaned pages with a single
+        # space is identical to cleaning the whole document at once
+        full_text = " ".join(cleaned_pages)
+        # Drop the per-page copies now, so only full_text is held while sections are built
+        cleaned_pages.clear()
+        sections = self.detect_sections(full_text)
 
         return {
-            "full_text": cleaned,
+            "full_text": full_text,
             "sections": sections,
             "chunks": chunks
         }
@@ -0,0 +1,173 @@
+import io
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+from app import config
+
+
+class PostprocessEngine:
+    """
+    Allocation-light version of the "SketchCourse" postprocessing:
+    marker-bleed blur + sharpen, forced black lines, slight hand-drawn noise.
+
+    - Pixels are copied once into a preallocated buffer (per image size) and every
+      step works in place on it.
+    - The black-line mask is max(R, G, B) < threshold, computed into reusable scratch
+      buffers instead of three masks and their AND.
+    - Noise comes from a seeded pool of tiles, split into positive / negative uint8 parts,
+      and is applied with a saturating add / subtract (minimum + add / subtract) instead
+      of a full-size int16 noise array and a clipped copy.
+
+    One engine per process; buffers are not shared across threads.
+    """
+
+    def __init__(
+        self,
+        black_threshold: int = 60,
+        noise_sigma: float = 2.0,
+        tile_size: int = 256,
+        pool_size: int = 16,
+        seed: int = 0,
+    ):
+        self.black_threshold = black_threshold
+        self.tile_size = tile_size
+        self._rng = np.random.default_rng(seed)
+
+        # Same distribution as the original normal(0, sigma).astype(int16)
+        noise = self._rng.normal(0, noise_sigma, (pool_size, tile_size, tile_size, 3)).astype(np.int16)
+        self._noise_pos = np.clip(noise, 0, 255).astype(np.uint8)
+        self._noise_neg = np.clip(-noise, 0, 255).astype(np.uint8)
+
+        self._buffers: Dict[Tuple[int, int], Dict[str, np.ndarray]] = {}
+
+    def _buffers_for(self, width: int, height: int) -> Dict[str, np.ndarray]:
+        bufs = self._buffers.get((width, height))
+        if bufs is None:
+            bufs = {
+                "pixels": np.empty((height, width, 3), dtype=np.uint8),
+                "channel_max": np.empty((height, width), dtype=np.uint8),
+                "mask": np.empty((height, width), dtype=bool),
+                "scratch": np.empty((self.tile_size, self.tile_size, 3), dtype=np.uint8),
+            }
+            self._buffers[(width, height)] = bufs
+        return bufs
+
+    # -------------------------------------------------------------
+    # Single Image
+    # -------------------------------------------------------------
+    def process(self, img: Image.Image) -> Image.Image:
+        img = img.convert("RGB")
+
+        # Slight blur + sharpen to mimic marker bleed
+        img = img.filter(ImageFilter.GaussianBlur(radius=0.3))
+        img = img.filter(ImageFilter.UnsharpMask(radius=1, percent=140, threshold=3))
+
+        bufs = self._buffers_for(*img.size)
+        arr = bufs["pixels"]
+        np.copyto(arr, np.asarray(img))
+
+        # Force black lines: all channels below threshold <=> max channel below threshold
+        np.max(arr, axis=2, out=bufs["channel_max"])
+        np.less(bufs["channel_max"], self.black_threshold, out=bufs["mask"])
+        np.copyto(arr, 0, where=bufs["mask"][:, :, None])
+
+        # Add slight noise for hand-drawn feel
+        self._add_noise(arr, bufs["scratch"])
+
+        return Image.fromarray(arr)
+
+    def _add_noise(self, arr: np.ndarray, scratch: np.ndarray):
+        height, width, _ = arr.shape
+        t = self.tile_size
+        picks = self._rng.integers(0, len(self._noise_pos), size=((height + t - 1) // t) * ((width + t - 1) // t))
+
+        i = 0
+        for y in range(0, height, t):
+            for x in range(0, width, t):
+                block = arr[y:y + t, x:x + t]
+                h, w, _ = block.shape
+                pos = self._noise_pos[picks[i], :h, :w]
+                neg = self._noise_neg[picks[i], :h, :w]
+                tmp = scratch[:h, :w]
+                i += 1
+
+                # Saturating add: block += min(pos, 255 - block)
+                np.subtract(255, block, out=tmp)
+                np.minimum(tmp, pos, out=tmp)
+                np.add(block, tmp, out=block)
+
+                # Saturating subtract: block -= min(neg, block)
+                np.minimum(block, neg, out=tmp)
+                np.subtract(block, tmp, out=block)
+
+    # -------------------------------------------------------------
+    # PNG In / Out
+    # -------------------------------------------------------------
+    def process_png(self, data: bytes) -> bytes:
+        img = self.process(Image.open(io.BytesIO(data)))
+        out = io.BytesIO()
+        img.save(out, format="PNG")
+        return out.getvalue()
+
+    def process_batch(self, images: List[bytes]) -> List[bytes]:
+        """Process several PNGs in one call, reusing the same buffers and noise pool."""
+        return [self.process_png(data) for data in images]
+
+
+# -------------------------------------------------------------
+# Process Pool
+# -------------------------------------------------------------
+_engine: Optional[PostprocessEngine] = None
+
+
+def get_engine() -> PostprocessEngine:
+    """Per-process engine (each pool worker builds its own buffers and noise pool once)."""
+    global _engine
+    if _engine is None:
+        _engine = PostprocessEngine()
+    return _engine
+
+
+def postprocess_png(data: bytes) -> bytes:
+    """Pool worker: decode, postprocess and re-encode one PNG."""
+    return get_engine().process_png(data)
+
+
+def postprocess_png_batch(images: List[bytes]) -> List[bytes]:
+    """Pool worker: one task for several PNGs."""
+    return get_engine().process_batch(images)
+
+
+# Dedicated pool for CPU-bound postprocessing, so it never competes with the
+# default executor (and stays off the event loop)
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_postprocess_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=config.SKETCH_POSTPROCESS_WORKERS)
+    return _pool
+
+
+async def postprocess_async(data: bytes) -> bytes:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_postprocess_pool(), postprocess_png, data)
+
+
+async def postprocess_batch_async(images: List[bytes]) -> List[bytes]:
+    """Split a batch into one task per worker; results keep input order."""
+    if not images:
+        return []
+    loop = asyncio.get_running_loop()
+    workers = max(1, config.SKETCH_POSTPROCESS_WORKERS)
+    size = (len(images) + workers - 1) // workers
+    chunks = [images[i:i + size] for i in range(0, len(images), size)]
+    results = await asyncio.gather(
+        *(loop.run_in_executor(get_postprocess_pool(), postprocess_png_batch, chunk) for chunk in chunks)
+    )
+    return [png for chunk in results for png in chunk]
@@ -2,13 +2,21 @@ import os
 import uuid
 import asyncio
 import gc
+from app import config
 from app.services.pdf_processor import PDFProcessor
+from app.services.pdf_cache import PDFCache
 from app.services.script_generator import ScriptGenerator
 from app.services.storyboard_generator import StoryboardGenerator
 from app.services.scene_composer import SceneComposer
 from app.services.video_renderer import VideoRenderer
+from app.services.render_scheduler import render_scheduler
+from app.services.clip_cache import ClipCache
+from app.services.hls_publisher import HLSPublisher
 from app.services.storage import StorageManager
 
+# Shared by every project so retries and re-renders reuse clips
+clip_cache = ClipCache()
+
 class ProjectOrchestrator:
     def __init__(self):
         self.pdf_processor = PDFProcessor()
@@ -17,72 +25,269 @@ class ProjectOrchestrator:
         self.scene_composer = SceneComposer()
         self.video_renderer = VideoRenderer()
         self.storage = StorageManager()
+        self.pdf_cache = PDFCache(self.storage)
+
+        # Scene encodes go through the node-wide scheduler (CPU-sized pool, fair across projects)
+        self.render_scheduler = render_scheduler
+        self.clip_cache = clip_cache
+
+    async def _render_scene(self, project_id: str, scene, clip_stats: dict) -> str:
+        """Serve the clip from the clip cache if its inputs are unchanged, else encode + cache it."""
+        key = await asyncio.to_thread(ClipCache.make_key, scene, self.video_renderer.encoder_settings())
+        path = await asyncio.to_thread(self.clip_cache.get, key)
+        if path:
+            clip_stats["hits"] += 1
+            return path
+
+        path = await self.render_scheduler.render_scene(project_id, scene)
+        clip_stats["misses"] += 1
+        try:
+            await asyncio.to_thread(self.clip_cache.put, key, path)
+        except Exception as e:
+            print(f"[{project_id}] Failed to cache clip: {e}")
+        return path
 
-    async def process_project(self, pdf_path: str, project_id: str, status_callback=None):
+    async def process_project(
+        self,
+        pdf_path: str,
+        project_id: str,
+        status_callback=None,
+        pdf_sha256: str = None,
+        streaming: bool = None,
+        pipeline_mode: str = None,
+        render_mode: str = None,
+        output_mode: str = None,
+        preview: bool = None,
+        aspects: list = None,
+    ):
         """
         Full pipeline: PDF -> Script -> Storyboard -> Scenes -> Video
+
+        In streaming mode the storyboard is parsed scene-by-scene as it is generated;
+        each scene goes straight to sketch + audio generation and then to rendering.
+        In "fused" pipeline mode the script and storyboard come from a single LLM call.
+        In "single_pass" render mode the whole video is encoded once all scenes are built,
+        instead of clip-per-scene + concat.
+        In "hls" output mode each finished clip is also published as HLS segments on a
+        growing playlist (stream_url in the status); final.mp4 is still produced. If a scene
+        can't be published, the playlist is ended early and stream_error says why.
+        With preview, a low-res "draft" profile render of the same scenes is published
+        (preview_url in the status) as soon as the scenes are built, ahead of the final render.
+        aspects lists extra output aspect ratios (e.g. ["vertical", "square"]): every scene is
+        rendered once into all aspects from a single ffmpeg graph, and each aspect gets its
+        own final_<aspect>.mp4 (aspect_urls in the status). Needs the per_scene render mode.
         """
-        async def update_status(step):
+        if streaming is None:
+            streaming = config.STORYBOARD_STREAMING
+        pipeline_mode = pipeline_mode or config.DEFAULT_PIPELINE_MODE
+        if pipeline_mode not in config.PIPELINE_MODES:
+            raise ValueError(f"Unknown pipeline mode: {pipeline_mode}")
+        fused = pipeline_mode == "fused"
+        render_mode = render_mode or config.DEFAULT_RENDER_MODE
+        if render_mode not in config.RENDER_MODES:
+            raise ValueError(f"Unknown render mode: {render_mode}")
+        per_scene = render_mode == "per_scene"
+        output_mode = output_mode or config.DEFAULT_OUTPUT_MODE
+        if output_mode not in config.OUTPUT_MODES:
+            raise ValueError(f"Unknown output mode: {output_mode}")
+        if output_mode == "hls" and not per_scene:
+            raise ValueError("HLS output needs the per_scene render mode")
+        aspects = [a for a in (aspects or []) if a != "landscape"]
+        for aspect in aspects:
+            if aspect not in config.OUTPUT_ASPECTS:
+                raise ValueError(f"Unknown output aspect: {aspect}")
+        if aspects and not per_scene:
+            raise ValueError("Extra output aspects need the per_scene render mode")
+        aspect_paths = {aspect: {} for aspect in aspects}  # aspect -> {scene index: clip path}
+        hls = HLSPublisher(project_id, self.storage) if output_mode == "hls" else None
+        if preview is None:
+            preview = config.RENDER_PREVIEW
+        preview_task = None
+
+        current = {"step": None, "stream_announced": False, "stream_stopped": False}
+
+        async def update_status(step, **extra):
+            current["step"] = step
             print(f"[{project_id}] {step}...")
             if status_callback:
-                await status_callback(step)
+                await status_callback(step, **extra)
+
+        # Per-scene progress, pushed to /events subscribers as a status extra
+        progress = {"scenes_built": 0, "scenes_rendered": 0, "scenes_total": None}
+
+        async def report_progress(counter=None):
+            if counter:
+                progress[counter] += 1
+            if status_callback:
+                await status_callback(current["step"], progress=dict(progress))
+
+        clip_stats = {"hits": 0, "misses": 0}
+
+        # Every local file this project creates (sketch/audio copies, clips, concats),
+        # recorded as it appears so the finally block can remove them on any outcome
+        local_files = []
+
+        async def publish_preview(scenes):
+            try:
+                path = await self.render_scheduler.render_project(project_id, scenes, profile="draft")
+                local_files.append(path)
+                dest = f"projects/{project_id}/preview.mp4"
+                url = await self.storage.upload_file_async(path, dest, True)
+                os.remove(path)
+                await update_status(current["step"], preview_url=url)
+            except Exception as e:
+                print(f"[{project_id}] Preview render failed: {e}")
+
+        async def render_and_publish(index, scene) -> str:
+            if aspects:
+                # One graph for every aspect; the per-aspect clips aren't clip-cached
+                paths = await self.render_scheduler.render_scene_multi(
+                    project_id, scene, ["landscape"] + aspects
+                )
+                local_files.extend(paths.values())
+                for aspect in aspects:
+                    aspect_paths[aspect][index] = paths[aspect]
+                path = paths["landscape"]
+            else:
+                path = await self._render_scene(project_id, scene, clip_stats)
+                local_files.append(path)
+            if hls:
+                # Best effort: final.mp4 is still the source of truth
+                try:
+                    published = await hls.add_scene(index, path)
+                except Exception as e:
+                    # add_scene has already retried and ended the stream: say so once
+                    print(f"[{project_id}] HLS publish failed for scene {index + 1}: {e}")
+                    published = False
+                    if not current["stream_stopped"]:
+                        current["stream_stopped"] = True
+                        await update_status(current["step"], stream_error=hls.error)
+                if published and not current["stream_announced"]:
+                    current["stream_announced"] = True
+                    await update_status(current["step"], stream_url=hls.playlist_url)
+            await report_progress("scenes_rendered")
+            return path
 
         await update_status("starting")
         
         try:
-            # 0. Data Collection: Save Source PDF
-            print(f"[{project_id}] Collecting source data...")
-            source_dest = f"projects/{project_id}/source.pdf"
-            self.storage.upload_file(pdf_path, source_dest)
-
-            # 1. Extract Text
+            # 0-1. Save Source PDF + Extract Text
+            # Content-addressed: identical uploads reuse the stored PDF and its extraction
             await update_status("extracting")
-            pdf_data = self.pdf_processor.process_pdf(pdf_path)
-            full_text = pdf_data["full_text"]
+            if not pdf_sha256:
+                pdf_sha256 = PDFCache.hash_file(pdf_path)
+            pdf_entry, cache_hit = await asyncio.to_thread(
+                self.pdf_cache.get_or_process, pdf_path, pdf_sha256, self.pdf_processor
+            )
+            if cache_hit:
+                print(f"[{project_id}] PDF cache hit ({pdf_sha256[:12]})")
+            full_text = pdf_entry["processed"]["full_text"]
             
-            # 2. Generate Script
-            await update_status("scripting")
-            script = self.script_generator.generate_script(full_text)
+            # 2. Generate Script (folded into the storyboard call in fused mode)
+            if not fused:
+                await update_status("scripting")
+                script = await self.script_generator.generate_script(full_text)
             
-            # 3. Generate Storyboard
-            await update_status("storyboard")
-            storyboard = self.storyboard_generator.generate_storyboard(script)
-            
-            # 4. Build Scenes (Sketches + Audio)
-            await update_status("scenes")
-            scenes = await self.scene_composer.build_scenes(storyboard)
-            gc.collect() # Free memory after image/audio generation
-            
-            # 5. Render Scenes & Final Video
-            await update_status("rendering")
-            
-            loop = asyncio.get_running_loop()
-            
-            # Render scenes in parallel (Max 5 minutes)
-            # High Performance Mode: Concurrency 4
-            sem = asyncio.Semaphore(4)
-
-            async def render_with_limit(scene):
-                async with sem:
-                    return await loop.run_in_executor(None, self.video_renderer.render_scene, scene)
-
-            render_tasks = [render_with_limit(s) for s in scenes]
-            scene_paths = await asyncio.gather(*render_tasks)
-            gc.collect() # Free memory after rendering clips
-                
-            final_video_path = self.video_renderer.concat_scenes(scene_paths)
-            
-            # 6. Upload Final Video
+            if streaming:
+                # 3-5. Storyboard -> Scenes -> Render, pipelined per scene
+                await update_status("storyboard")
+                render_tasks = {}
+                built = []
+
+                async def scene_built(index, scene):
+                    local_files.extend([scene.sketch_path, scene.audio_path])
+                    if per_scene:
+                        render_tasks[index] = asyncio.create_task(render_and_publish(index, scene))
+                    built.append(index)
+                    if len(built) == 1:
+                        await update_status("scenes")
+                    await report_progress("scenes_built")
+
+                try:
+                    if fused:
+                        scene_stream = self.storyboard_generator.stream_fused_storyboard(full_text)
+                    else:
+                        scene_stream = self.storyboard_generator.stream_storyboard(script)
+
+                    scenes = await self.scene_composer.build_scenes_streaming(scene_stream, on_scene=scene_built)
+                    progress["scenes_total"] = len(scenes)
+                    gc.collect() # Free memory after image/audio generation
+                    if preview:
+                        preview_task = asyncio.create_task(publish_preview(scenes))
+
+                    await update_status("rendering", progress=dict(progress))
+                    if per_scene:
+                        scene_paths = await asyncio.gather(*(render_tasks[i] for i in range(len(scenes))))
+                except BaseException:
+                    for task in render_tasks.values():
+                        task.cancel()
+                    # Let them settle, so no clip lands after the cleanup below
+                    await asyncio.gather(*render_tasks.values(), return_exceptions=True)
+                    raise
+            else:
+                # 3. Generate Storyboard
+                await update_status("storyboard")
+                if fused:
+                    storyboard = await self.storyboard_generator.generate_fused_storyboard(full_text)
+                else:
+                    storyboard = await self.storyboard_generator.generate_storyboard(script)
+
+                # 4. Build Scenes (Sketches + Audio)
+                progress["scenes_total"] = len(storyboard["scenes"])
+                await update_status("scenes")
+
+                async def scene_done(index, scene):
+                    local_files.extend([scene.sketch_path, scene.audio_path])
+                    await report_progress("scenes_built")
+
+                scenes = await self.scene_composer.build_scenes(storyboard, on_scene=scene_done)
+                gc.collect() # Free memory after image/audio generation
+                if preview:
+                    preview_task = asyncio.create_task(publish_preview(scenes))
+
+                # 5. Render Scenes & Final Video
+                await update_status("rendering", progress=dict(progress))
+                if per_scene:
+                    scene_paths = await asyncio.gather(*(render_and_publish(i, s) for i, s in enumerate(scenes)))
+
+            if hls:
+                try:
+                    await hls.finish()
+                except Exception as e:
+                    print(f"[{project_id}] Failed to finish HLS playlist: {e}")
+
+            if per_scene:
+                gc.collect() # Free memory after rendering clips
+                lookups = clip_stats["hits"] + clip_stats["misses"]
+                await update_status("rendering", clip_cache={
+                    **clip_stats,
+                    "hit_ratio": clip_stats["hits"] / lookups if lookups else 0.0,
+                })
+                final_video_path = await self.render_scheduler.concat(project_id, scene_paths)
+                local_files.append(final_video_path)
+
+                if aspects:
+                    aspect_urls = {}
+                    for aspect in aspects:
+                        clips = [aspect_paths[aspect][i] for i in range(len(scenes))]
+                        aspect_video_path = await self.render_scheduler.concat(project_id, clips)
+                        local_files.append(aspect_video_path)
+                        dest = f"projects/{project_id}/final_{aspect}.mp4"
+                        aspect_urls[aspect] = await self.storage.upload_file_async(aspect_video_path, dest)
+                    await update_status("rendering", aspect_urls=aspect_urls)
+            else:
+                # One filter graph, one encode, no intermediate clips
+                final_video_path = await self.render_scheduler.render_project(project_id, scenes)
+                local_files.append(final_video_path)
+                progress["scenes_rendered"] = len(scenes)
+                await report_progress()
+
+
+            # 6. Upload Final Video (never held back by the preview)
             await update_status("uploading")
             dest = f"projects/{project_id}/final.mp4"
-            final_url = self.storage.upload_file(final_video_path, dest)
-            
-            # Cleanup
-            os.remove(final_video_path)
-            for p in scene_paths:
-                if os.path.exists(p):
-                    os.remove(p)
-                    
+            final_url = await self.storage.upload_file_async(final_video_path, dest)
+
             print(f"[{project_id}] DONE! Video URL: {final_url}")
             return final_url
 
@@ -90,14 +295,23 @@ class ProjectOrchestrator:
             print(f"[{project_id}] CRITICAL PIPELINE ERROR: {e}")
             import traceback
             traceback.print_exc()
-            
-            try:
-                self.storage.save_json(status_path, {
-                    "id": project_id,
-                    "status": "failed", 
-                    "error": str(e)
-                })
-            except Exception as write_err:
-                print(f"[{project_id}] Failed to write error status: {write_err}")
-            
+
+            # The caller records the failed status (see routes/projects.run_pipeline_task)
             raise e
+
+        finally:
+            # On failure too: end the playlist so players stop polling, and drop the workdir
+            if hls:
+                try:
+                    await hls.finish()
+                except Exception as e:
+                    print(f"[{project_id}] Failed to finish HLS playlist: {e}")
+
+            # Cleanup (success, failure or cancellation). The preview reads the scene files:
+            # if it is still going it lost the race (cancelling also stops its render job)
+            if preview_task:
+                preview_task.cancel()
+                await asyncio.gather(preview_task, return_exceptions=True)
+            for p in local_files:
+                if p and os.path.exists(p):
+                    os.remove(p)
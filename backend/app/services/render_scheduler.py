@@ -0,0 +1,229 @@
+import os
+import time
+import uuid
+import asyncio
+import resource
+import tempfile
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+from app import config
+
+
+def _timed_call(fn: Callable, args: tuple, cancel_path: Optional[str] = None) -> Tuple[object, float, float]:
+    """
+    Pool worker: run one job, returning (result, wall seconds, CPU seconds incl. ffmpeg).
+    The job's ffmpeg is killed once cancel_path exists (see RenderScheduler._run).
+    """
+    from app.utils.ffmpeg_utils import set_cancel_path
+
+    start = time.monotonic()
+    before = resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN)
+    set_cancel_path(cancel_path)
+    try:
+        result = fn(*args)
+    finally:
+        set_cancel_path(None)
+    after = resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    cpu = sum(
+        (a.ru_utime + a.ru_stime) - (b.ru_utime + b.ru_stime)
+        for a, b in zip(after, before)
+    )
+    return result, time.monotonic() - start, cpu
+
+
+def _remove_outputs(result):
+    """Delete a job's output file(s): a path, or a dict of paths (multi-aspect)."""
+    paths = result.values() if isinstance(result, dict) else [result]
+    for path in paths:
+        if isinstance(path, str) and os.path.exists(path):
+            os.remove(path)
+
+
+def render_scene_job(scene, threads: int, profile: str = "final") -> str:
+    """Pool worker: render one scene clip with a fixed encoder thread budget."""
+    from app.services.video_renderer import VideoRenderer
+    return VideoRenderer(threads=threads, profile=profile).render_scene(scene)
+
+
+def render_scene_multi_job(scene, threads: int, aspects, profile: str = "final") -> dict:
+    """Pool worker: render one scene in several aspect ratios from one graph."""
+    from app.services.video_renderer import VideoRenderer
+    return VideoRenderer(threads=threads, profile=profile).render_scene_multi(scene, aspects)
+
+
+def render_project_job(scenes, threads: int, profile: str = "final") -> str:
+    """Pool worker: single-pass render of a whole project."""
+    from app.services.video_renderer import VideoRenderer
+    return VideoRenderer(threads=threads, profile=profile).render_project(scenes)
+
+
+def concat_job(scene_paths) -> str:
+    """Pool worker: stream-copy finished clips into one video."""
+    from app.services.video_renderer import VideoRenderer
+    return VideoRenderer().concat_scenes(scene_paths)
+
+
+class RenderScheduler:
+    """
+    Node-wide scheduler for CPU-heavy render jobs (ffmpeg encodes).
+
+    - Concurrency is sized from the cores: workers = cpu_count // threads_per_encode,
+      and every encode gets the same -threads budget, so concurrent projects can't
+      oversubscribe the box.
+    - Jobs queue per project and are dispatched round-robin across projects, so one
+      long project doesn't starve the others.
+    - Jobs run in a process pool; callers just await submit(). Cancelling the await
+      drops a queued job, or stops a running one's ffmpeg.
+    """
+
+    def __init__(self, workers: Optional[int] = None, threads_per_encode: int = config.RENDER_THREADS_PER_ENCODE):
+        cores = os.cpu_count() or 1
+        self.cores = cores
+        self.threads_per_encode = threads_per_encode
+        self.workers = workers or config.RENDER_WORKERS or max(1, cores // threads_per_encode)
+
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._queues: "OrderedDict[str, Deque]" = OrderedDict()
+        self._running = 0
+
+        # Metrics
+        self.completed = 0
+        self.failed = 0
+        self.total_wall = 0.0
+        self.max_wall = 0.0
+        self.last_wall = 0.0
+        self.total_wait = 0.0
+        self._cpu_window: Deque[Tuple[float, float]] = deque()  # (finished_at, cpu seconds)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    # -------------------------------------------------------------
+    # Submit / Dispatch
+    # -------------------------------------------------------------
+    async def submit(self, project_id: str, fn: Callable, *args, urgent: bool = False):
+        """
+        Queue fn(*args) (picklable, module-level) for project_id and await its result.
+        urgent jobs go to the front of their project's queue (fairness across projects is kept).
+        """
+        future = asyncio.get_running_loop().create_future()
+        queue = self._queues.setdefault(project_id, deque())
+        job = (fn, args, future, time.monotonic())
+        if urgent:
+            queue.appendleft(job)
+        else:
+            queue.append(job)
+        self._dispatch()
+        return await future
+
+    async def render_scene(self, project_id: str, scene, profile: str = "final") -> str:
+        return await self.submit(project_id, render_scene_job, scene, self.threads_per_encode, profile)
+
+    async def render_scene_multi(self, project_id: str, scene, aspects, profile: str = "final") -> dict:
+        return await self.submit(project_id, render_scene_multi_job, scene, self.threads_per_encode, aspects, profile)
+
+    async def render_project(self, project_id: str, scenes, profile: str = "final") -> str:
+        # Drafts are the user-visible preview: let them jump the project's queue
+        return await self.submit(
+            project_id, render_project_job, scenes, self.threads_per_encode, profile,
+            urgent=profile == "draft",
+        )
+
+    async def concat(self, project_id: str, scene_paths) -> str:
+        return await self.submit(project_id, concat_job, list(scene_paths))
+
+    def _dispatch(self):
+        while self._running < self.workers:
+            job = self._next_job()
+            if job is None:
+                return
+            self._running += 1
+            asyncio.get_running_loop().create_task(self._run(*job))
+
+    def _next_job(self):
+        """Pop the next job round-robin: take from the first project, then move it to the back."""
+        while self._queues:
+            project_id, queue = next(iter(self._queues.items()))
+            job = queue.popleft()
+            if queue:
+                self._queues.move_to_end(project_id)
+            else:
+                del self._queues[project_id]
+            if not job[2].cancelled():
+                return job
+        return None
+
+    async def _run(self, fn: Callable, args: tuple, future: asyncio.Future, enqueued_at: float):
+        loop = asyncio.get_running_loop()
+        self.total_wait += time.monotonic() - enqueued_at
+
+        # The worker can't be interrupted directly: a cancelled caller leaves a flag file instead
+        cancel_path = os.path.join(tempfile.gettempdir(), f"render_cancel_{uuid.uuid4()}")
+
+        def on_done(f: asyncio.Future):
+            if f.cancelled():
+                open(cancel_path, "w").close()
+
+        future.add_done_callback(on_done)
+        try:
+            result, wall, cpu = await loop.run_in_executor(self._get_pool(), _timed_call, fn, args, cancel_path)
+        except Exception as e:
+            self.failed += 1
+            if not future.done():
+                future.set_exception(e)
+        else:
+            self._record(wall, cpu)
+            if not future.done():
+                future.set_result(result)
+            elif future.cancelled():
+                # Finished before it noticed the cancel: nobody will pick the output up
+                _remove_outputs(result)
+        finally:
+            future.remove_done_callback(on_done)
+            if os.path.exists(cancel_path):
+                os.remove(cancel_path)
+            self._running -= 1
+            self._dispatch()
+
+    # -------------------------------------------------------------
+    # Metrics
+    # -------------------------------------------------------------
+    def _record(self, wall: float, cpu: float):
+        self.completed += 1
+        self.total_wall += wall
+        self.last_wall = wall
+        self.max_wall = max(self.max_wall, wall)
+
+        now = time.monotonic()
+        self._cpu_window.append((now, cpu))
+        while self._cpu_window and self._cpu_window[0][0] < now - 60:
+            self._cpu_window.popleft()
+
+    def metrics(self) -> Dict:
+        started = self.completed + self.failed
+        cpu_last_minute = sum(cpu for _, cpu in self._cpu_window)
+        return {
+            "workers": self.workers,
+            "threads_per_encode": self.threads_per_encode,
+            "running": self._running,
+            "queue_length": sum(len(q) for q in self._queues.values()),
+            "queued_by_project": {pid: len(q) for pid, q in self._queues.items()},
+            "completed": self.completed,
+            "failed": self.failed,
+            "avg_wall_seconds": self.total_wall / self.completed if self.completed else 0.0,
+            "max_wall_seconds": self.max_wall,
+            "last_wall_seconds": self.last_wall,
+            "avg_queue_wait_seconds": self.total_wait / started if started else 0.0,
+            # Share of all cores spent in encodes finished during the last minute
+            "encode_cpu_utilisation": cpu_last_minute / (60 * self.cores),
+            "load_per_core": os.getloadavg()[0] / self.cores,
+        }
+
+
+# One scheduler per node (process), shared by every project
+render_scheduler = RenderScheduler()
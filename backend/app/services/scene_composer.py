@@ -1,78 +1,94 @@
-import os
-import uuid
-import requests
 import asyncio
-from typing import List, Dict
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
 from app.services.scene_model import Scene
+from app.services.motion import motion_for_scene
 from app.services.sketch_engine import SketchEngine
-from app.services.tts_engine import TTSEngine
+from app.services.tts_engine import AudioClip, TTSEngine
 
 class SceneComposer:
     def __init__(self):
         self.sketch_engine = SketchEngine()
         self.tts_engine = TTSEngine()
 
-    async def build_scenes(self, storyboard: Dict) -> List[Scene]:
+        # High Performance Mode: Concurrency 10
+        self.audio_semaphore = asyncio.Semaphore(10)
+
+    async def _generate_audio(self, narration: str) -> Optional[AudioClip]:
+        if not narration:
+            return None
+        async with self.audio_semaphore:
+            return await self.tts_engine.generate_clip(narration)
+
+    async def build_scene(self, scene_data: Dict, index: int = 0) -> Scene:
+        """
+        Build one Scene: sketch and narration audio are generated concurrently.
+        The sketch is rendered from its local file; its upload finishes in the background.
+        """
+        sketch_data, audio = await asyncio.gather(
+            self.sketch_engine.generate_async(
+                scene_data.get("visual_prompt"),
+                scene_data.get("accents", []),
+                True # Default to true for now
+            ),
+            self._generate_audio(scene_data.get("narration", "")),
+        )
+
+        return Scene(
+            sketch_path=sketch_data["path"],
+            text=scene_data.get("text_overlay", ""),
+            duration=scene_data.get("duration_seconds", 4),
+            motion=motion_for_scene(index, scene_data.get("motion")),
+            audio_path=audio.path if audio else None,
+            narration=scene_data.get("narration", ""),
+            audio_duration=audio.duration if audio else None,
+        )
+
+    async def build_scenes(
+        self,
+        storyboard: Dict,
+        on_scene: Optional[Callable[[int, Scene], Awaitable[None]]] = None,
+    ) -> List[Scene]:
         """
         Convert storyboard JSON into Scene objects.
-        Generates sketches in parallel and downloads them.
-        Generates audio for each scene.
+        Generates sketches and audio for all scenes in parallel; on_scene(index, scene)
+        is awaited as each scene finishes.
         """
-        
-        # 1. Prepare batch items for SketchEngine
-        batch_items = []
-        for s in storyboard["scenes"]:
-            batch_items.append({
-                "description": s.get("visual_prompt"),
-                "accents": s.get("accents", []),
-                "allow_text": True # Default to true for now
-            })
-            
-        # 2. Generate all sketches in parallel
-        print(f"Generating {len(batch_items)} sketches...")
-        sketches = await self.sketch_engine.generate_batch(batch_items)
-        
-        scenes = []
-        
-        # 3. Generate Audio in Parallel (Max 2 minutes)
-        print(f"Generating audio for {len(storyboard['scenes'])} scenes...")
-        
-        # High Performance Mode: Concurrency 10
-        sem = asyncio.Semaphore(10)
+        print(f"Generating sketches + audio for {len(storyboard['scenes'])} scenes...")
+
+        async def build_and_notify(index: int, scene_data: Dict) -> Scene:
+            scene = await self.build_scene(scene_data, index)
+            if on_scene:
+                await on_scene(index, scene)
+            return scene
+
+        scenes = await asyncio.gather(*(build_and_notify(i, s) for i, s in enumerate(storyboard["scenes"])))
+        return list(scenes)
+
+    async def build_scenes_streaming(
+        self,
+        scene_stream: AsyncIterator[Dict],
+        on_scene: Optional[Callable[[int, Scene], Awaitable[None]]] = None,
+    ) -> List[Scene]:
+        """
+        Streaming variant of build_scenes: production of each scene starts as soon as
+        it arrives from the stream. on_scene(index, scene) is awaited as each scene
+        finishes (in completion order). Returns all scenes in storyboard order.
+        """
+        tasks = []
 
-        async def generate_audio_for_scene(scene_data):
-            async with sem:
-                narration = scene_data.get("narration", "")
-                if narration:
-                    # Run TTS in executor to avoid blocking
-                    loop = asyncio.get_running_loop()
-                    return await loop.run_in_executor(None, self.tts_engine.generate_audio, narration)
-                return None
+        async def build_and_notify(index: int, scene_data: Dict) -> Scene:
+            scene = await self.build_scene(scene_data, index)
+            if on_scene:
+                await on_scene(index, scene)
+            return scene
 
-        audio_tasks = [generate_audio_for_scene(s) for s in storyboard["scenes"]]
-        audio_paths = await asyncio.gather(*audio_tasks)
+        try:
+            async for scene_data in scene_stream:
+                print(f"Scene {len(tasks) + 1} received, starting sketch + audio...")
+                tasks.append(asyncio.create_task(build_and_notify(len(tasks), scene_data)))
 
-        scenes = []
-        
-        # 4. Map back to scenes
-        for i, s in enumerate(storyboard["scenes"]):
-            sketch_data = sketches[i]
-            sketch_url = sketch_data["url"]
-            
-            file_id = str(uuid.uuid4())
-            tmp_path = f"/tmp/sketch_{file_id}.png"
-            
-            raw = requests.get(sketch_url).content
-            with open(tmp_path, "wb") as f:
-                f.write(raw)
-            
-            scenes.append(Scene(
-                sketch_path=tmp_path,
-                text=s.get("text_overlay", ""),
-                duration=s.get("duration_seconds", 4),
-                motion="zoom_in", 
-                audio_path=audio_paths[i],
-                narration=s.get("narration", "")
-            ))
-            
-        return scenes
+            return list(await asyncio.gather(*tasks))
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
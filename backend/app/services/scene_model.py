@@ -9,3 +9,4 @@ class Scene:
     motion: str               # "zoom_in", "pan_left", etc.
     audio_path: Optional[str] = None
     narration: Optional[str] = None
+    audio_duration: Optional[float] = None  # seconds, measured when the audio was produced
@@ -1,14 +1,15 @@
-import os
 import json
 from typing import Dict
-from openai import OpenAI
+from app import config
+from app.utils.ai_client import chat_completion
 
 class ScriptGenerator:
-    def __init__(self):
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    def __init__(self, llm_client=None):
+        # None -> the shared process-wide AsyncOpenAI client
+        self.client = llm_client
         self.model = "gpt-4o"
 
-    def generate_script(self, text: str, target_duration_minutes: int = 3) -> Dict:
+    async def generate_script(self, text: str, target_duration_minutes: int = 3, use_cache: bool = True) -> Dict:
         """
         Generates a scene-by-scene video script from the provided text.
         """
@@ -46,20 +47,22 @@ class ScriptGenerator:
         Create a script that explains the core concepts efficiently.
         """
 
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT},
-                    {"role": "user", "content": USER_PROMPT}
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.7
-            )
-            
-            content = response.choices[0].message.content
-            return json.loads(content)
-            
-        except Exception as e:
-            print(f"Error generating script: {e}")
-            raise e
+        for attempt in range(config.LLM_PARSE_RETRIES + 1):
+            try:
+                # Retries skip the cache: the cached reply is the one that failed
+                return await chat_completion(
+                    self.client,
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": SYSTEM_PROMPT},
+                        {"role": "user", "content": USER_PROMPT}
+                    ],
+                    response_format={"type": "json_object"},
+                    temperature=0.7,
+                    use_cache=use_cache and attempt == 0,
+                    parse=json.loads
+                )
+            except Exception as e:
+                print(f"Error generating script: {e}")
+                if attempt == config.LLM_PARSE_RETRIES:
+                    raise e
@@ -0,0 +1,195 @@
+import os
+import re
+import json
+import time
+import shutil
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, FrozenSet, Optional
+
+from app import config
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset({"a", "an", "the", "of", "with", "and", "in", "on", "to", "for", "showing", "that", "is"})
+
+
+def normalise_prompt(text: str) -> str:
+    return " ".join(_WORD_RE.findall(text.lower()))
+
+
+def _tokens(text: str) -> FrozenSet[str]:
+    return frozenset(w for w in _WORD_RE.findall(text.lower()) if w not in _STOPWORDS)
+
+
+class SketchCache:
+    """
+    Cache of postprocessed sketches, reusable across projects.
+
+    - Exact tier: keyed by the normalised FLUX prompt plus the generation parameters
+      (model, steps, guidance, size).
+    - Similar tier (optional): if no exact hit, the scene description is compared
+      against cached descriptions generated with the same accents/text policy/params
+      using token Jaccard similarity; a match above similarity_threshold is reused.
+
+    The index lives in SQLite next to the PNGs, so it survives restarts.
+    Least recently used sketches are evicted once max_bytes is exceeded.
+    """
+
+    def __init__(
+        self,
+        root: str = os.path.join(config.CACHE_DIR, "sketches"),
+        max_bytes: int = config.SKETCH_CACHE_MAX_BYTES,
+        similarity_threshold: float = config.SKETCH_SIMILARITY_THRESHOLD,
+    ):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.similarity_threshold = similarity_threshold
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(root, "index.sqlite3"), check_same_thread=False)
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sketches (
+                key TEXT PRIMARY KEY,
+                context TEXT NOT NULL,
+                description TEXT NOT NULL,
+                storage_path TEXT,
+                size INTEGER NOT NULL,
+                accessed REAL NOT NULL
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS sketches_accessed ON sketches(accessed)")
+        self._db.commit()
+
+        # In-memory similarity index: context -> {key: description tokens}
+        self._index: Dict[str, Dict[str, FrozenSet[str]]] = {}
+        for key, context, description in self._db.execute("SELECT key, context, description FROM sketches"):
+            self._index.setdefault(context, {})[key] = _tokens(description)
+
+    # -------------------------------------------------------------
+    # Keys
+    # -------------------------------------------------------------
+    @staticmethod
+    def make_key(prompt: str, params: Dict) -> str:
+        payload = json.dumps({"prompt": normalise_prompt(prompt), "params": params}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @staticmethod
+    def make_context(accents, allow_text: bool, params: Dict) -> str:
+        payload = json.dumps(
+            {"accents": sorted(accents or []), "allow_text": allow_text, "params": params},
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.png")
+
+    # -------------------------------------------------------------
+    # Lookup / Store
+    # -------------------------------------------------------------
+    def lookup(self, key: str, context: str, description: str, allow_similar: bool = True) -> Optional[Dict]:
+        """
+        Return {"key", "path", "storage_path", "similarity"} for an exact or near-duplicate
+        hit, or None.
+        """
+        with self._lock:
+            entry = self._get(key)
+            if entry:
+                self.hits += 1
+                entry["similarity"] = 1.0
+                return entry
+
+            if allow_similar and self.similarity_threshold:
+                best_key, best_score = None, 0.0
+                wanted = _tokens(description)
+                for candidate, tokens in self._index.get(context, {}).items():
+                    if not tokens or not wanted:
+                        continue
+                    score = len(wanted & tokens) / len(wanted | tokens)
+                    if score > best_score:
+                        best_key, best_score = candidate, score
+
+                if best_key and best_score >= self.similarity_threshold:
+                    entry = self._get(best_key)
+                    if entry:
+                        self.similar_hits += 1
+                        entry["similarity"] = best_score
+                        return entry
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, context: str, description: str, src_path: str, storage_path: Optional[str]) -> str:
+        """Copy a finished sketch into the cache and return the cached path."""
+        path = self.path_for(key)
+        tmp_path = f"{path}.tmp"
+        shutil.copyfile(src_path, tmp_path)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sketches (key, context, description, storage_path, size, accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, context, description, storage_path, os.path.getsize(path), time.time()),
+            )
+            self._index.setdefault(context, {})[key] = _tokens(description)
+            self._evict()
+            self._db.commit()
+        return path
+
+    def discard(self, key: str):
+        with self._lock:
+            self._remove(key)
+            self._db.commit()
+
+    def _get(self, key: str) -> Optional[Dict]:
+        row = self._db.execute("SELECT storage_path FROM sketches WHERE key = ?", (key,)).fetchone()
+        if not row:
+            return None
+
+        path = self.path_for(key)
+        if not os.path.exists(path):
+            self._remove(key)
+            self._db.commit()
+            return None
+
+        self._db.execute("UPDATE sketches SET accessed = ? WHERE key = ?", (time.time(), key))
+        self._db.commit()
+        return {"key": key, "path": path, "storage_path": row[0]}
+
+    def _remove(self, key: str):
+        row = self._db.execute("SELECT context FROM sketches WHERE key = ?", (key,)).fetchone()
+        if row:
+            self._index.get(row[0], {}).pop(key, None)
+        self._db.execute("DELETE FROM sketches WHERE key = ?", (key,))
+        try:
+            os.remove(self.path_for(key))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM sketches").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._db.execute("SELECT key, size FROM sketches ORDER BY accessed ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._remove(key)
+            total -= size
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.similar_hits + self.misses
+        return {
+            "hits": self.hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits + self.similar_hits) / lookups if lookups else 0.0,
+            "entries": sum(len(v) for v in self._index.values()),
+        }
@@ -1,13 +1,50 @@
 import os
 import uuid
+import shutil
 import replicate
-import requests
+from replicate.exceptions import ReplicateError
 from typing import Dict, List, Optional
-from PIL import Image, ImageFilter
-import numpy as np
+from PIL import Image
+import re
 import asyncio
-import time
+from app import config
 from app.services.storage import StorageManager
+from app.services.postprocess import get_engine, postprocess_async
+from app.services.sketch_cache import SketchCache
+from app.utils.http_client import get_http_client
+from app.utils.rate_limiter import AdaptiveRateLimiter
+
+# Shared by every SketchEngine (and every project) in the process
+sketch_rate_limiter = AdaptiveRateLimiter(
+    "replicate-flux",
+    initial_rate=config.SKETCH_RATE_INITIAL,
+    min_rate=config.SKETCH_RATE_MIN,
+    max_rate=config.SKETCH_RATE_MAX,
+    increase_step=config.SKETCH_RATE_STEP,
+    burst=config.SKETCH_RATE_BURST,
+    redis_url=config.REDIS_URL,
+)
+
+# Sketches are reused across projects, so the cache is process-wide too
+sketch_cache = SketchCache()
+
+
+def _is_rate_limit(error: Exception) -> bool:
+    if isinstance(error, ReplicateError) and error.status == 429:
+        return True
+    text = str(error).lower()
+    return "429" in text or "rate limit" in text or "throttled" in text
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Pull a retry hint ("... available in 8 seconds") out of a 429 error, if any."""
+    match = re.search(r"(\d+(?:\.\d+)?)\s*s(?:ec(?:ond)?s?)?\b", str(error))
+    return float(match.group(1)) if match else None
+
+
+def _write_file(path: str, data: bytes):
+    with open(path, "wb") as f:
+        f.write(data)
 
 
 class SketchEngine:
@@ -20,21 +57,35 @@ class SketchEngine:
     - Hybrid text policy (labels OK, no paragraphs)
     - Accent color support (black primary)
     - Postprocessing for line consistency
-    - Supabase upload
+    - Local PNG result, Supabase upload in the background
     """
 
-    def __init__(self):
+    def __init__(self, storage: Optional[StorageManager] = None):
         token = os.getenv("REPLICATE_API_TOKEN")
         if not token:
             raise Exception("REPLICATE_API_TOKEN missing from environment")
 
-        os.environ["REPLICATE_API_TOKEN"] = token
+        self.client = replicate.Client(api_token=token, base_url=config.REPLICATE_BASE_URL)
 
         self.model = "black-forest-labs/flux-schnell"
-        self.storage = StorageManager()
+        self.storage = storage or StorageManager()
+        self.cache = sketch_cache
+
+        # Everything besides the prompt that determines the image
+        self.generation_params = {
+            "num_inference_steps": 4, # Schnell model limit
+            "guidance": 3.5, # Adjusted for lower steps
+            "width": 1024,
+            "height": 768,
+        }
 
         self.default_accents = ["blue", "red", "green", "yellow"]
 
+        # High Performance Mode: shared by batch and per-scene callers
+        self.semaphore = asyncio.Semaphore(config.SKETCH_CONCURRENCY)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._uploads: Dict[str, asyncio.Task] = {}
+
 
     # -------------------------------------------------------------
     # Prompt Builder
@@ -71,114 +122,230 @@ class SketchEngine:
     # -------------------------------------------------------------
     # Postprocessing
     # -------------------------------------------------------------
-    def postprocess_image(self, img: Image.Image) -> Image.Image:
+    @staticmethod
+    def postprocess_image(img: Image.Image) -> Image.Image:
         """
-        Enforces consistent "SketchCourse" style.
+        Enforces consistent "SketchCourse" style (see PostprocessEngine).
         """
+        return get_engine().process(img)
 
-        img = img.convert("RGB")
-
-        # Slight blur + sharpen to mimic marker bleed
-        img = img.filter(ImageFilter.GaussianBlur(radius=0.3))
-        img = img.filter(ImageFilter.UnsharpMask(radius=1, percent=140, threshold=3))
-
-        arr = np.array(img)
 
-        # Force black lines
-        black_threshold = 60
-        mask = np.logical_and(
-            arr[:, :, 0] < black_threshold,
-            arr[:, :, 1] < black_threshold,
-            arr[:, :, 2] < black_threshold,
+    # -------------------------------------------------------------
+    # Single Sketch Generation
+    # -------------------------------------------------------------
+    async def _predict(self, prompt: str) -> str:
+        """Create a FLUX prediction and poll it to completion. Returns the output image URL."""
+        prediction = await self.client.models.predictions.async_create(
+            model=self.model,
+            input={"prompt": prompt, **self.generation_params},
         )
-        arr[mask] = [0, 0, 0]
 
-        # Add slight noise for hand-drawn feel
-        noise = np.random.normal(0, 2, arr.shape).astype(np.int16)
-        arr = np.clip(arr + noise, 0, 255).astype(np.uint8)
+        while prediction.status not in ("succeeded", "failed", "canceled"):
+            await asyncio.sleep(config.SKETCH_POLL_INTERVAL)
+            await prediction.async_reload()
 
-        return Image.fromarray(arr)
+        if prediction.status != "succeeded":
+            raise Exception(f"Prediction {prediction.id} {prediction.status}: {prediction.error}")
 
+        output = prediction.output
+        return output[0] if isinstance(output, list) else output
 
-    # -------------------------------------------------------------
-    # Single Sketch Generation
-    # -------------------------------------------------------------
-    def generate(self, description: str, accents: Optional[List[str]] = None, allow_text: bool = True) -> Dict:
+    async def _finish(self, img_url: str, prompt: str, cache_entry: Optional[Dict] = None) -> Dict:
         """
-        Generate a single sketch from a description.
+        Download and postprocess a generated image into a local PNG.
+        The Supabase upload runs in the background (see ensure_uploaded), so callers
+        can render from "path" straight away.
+        cache_entry ({"key", "context", "description"}) stores the result in the sketch cache.
         """
-
-        accents = accents or self.default_accents
-        prompt = self.build_prompt(description, accents, allow_text)
-
-        # Retry logic for 429/Rate Limits
-        max_retries = 20
-        base_delay = 2
-
-        for attempt in range(max_retries):
-            try:
-                output = replicate.run(
-                    self.model,
-                    input={
-                        "prompt": prompt,
-                        "num_inference_steps": 4, # Schnell model limit
-                        "guidance": 3.5, # Adjusted for lower steps
-                        "width": 1024,
-                        "height": 768,
-                    },
-                )
-                break # Success!
-            except Exception as e:
-                is_rate_limit = "429" in str(e) or "rate limit" in str(e).lower()
-                if is_rate_limit and attempt < max_retries - 1:
-                    # If we hit a rate limit, wait significantly longer
-                    # Replicate free tier is 6 req/min, so we need ~10s gap
-                    # Add random jitter to prevent thundering herd
-                    import random
-                    jitter = random.uniform(1, 5)
-                    delay = (base_delay * (1.5 ** attempt)) + 10 + jitter
-                    print(f"Rate limit hit (Attempt {attempt+1}/{max_retries}). Cooling down for {delay:.1f}s...")
-                    import time
-                    time.sleep(delay)
-                elif attempt < max_retries - 1:
-                    # Normal error, short retry
-                    delay = base_delay * (2 ** attempt)
-                    print(f"Generation error: {e}. Retrying in {delay}s...")
-                    import time
-                    time.sleep(delay)
-                else:
-                    raise Exception(f"FLUX generation failed after {attempt+1} attempts: {str(e)}")
-
-        img_url = output[0]
         file_id = str(uuid.uuid4())
-        tmp_path = f"/tmp/{file_id}.png"
+        tmp_path = f"/tmp/sketch_{file_id}.png"
 
         # Download
-        raw = requests.get(img_url).content
-        with open(tmp_path, "wb") as f:
-            f.write(raw)
+        response = await get_http_client().get(img_url)
+        response.raise_for_status()
 
-        # Postprocess
-        img = Image.open(tmp_path)
-        img = self.postprocess_image(img)
-        img.save(tmp_path)
+        # Postprocess (CPU-bound -> dedicated process pool)
+        png = await postprocess_async(response.content)
+        await asyncio.to_thread(_write_file, tmp_path, png)
 
-        # Upload to Supabase
         dest = f"sketches/{file_id}.png"
-        final_url = self.storage.upload_file(tmp_path, dest)
+        cache_key = None
+        if cache_entry:
+            cache_key = cache_entry["key"]
+            await asyncio.to_thread(
+                self.cache.put, cache_key, cache_entry["context"], cache_entry["description"], tmp_path, dest
+            )
 
-        os.remove(tmp_path)
+        # Upload from memory, so the local file may be removed before the upload lands
+        self._start_upload(file_id, png, dest, cache_key)
 
         return {
             "id": file_id,
-            "url": final_url,
+            "path": tmp_path,
+            "storage_path": dest,
+            "url": None,
             "prompt": prompt,
         }
 
+    async def _private_copy(self, *sources: str) -> Optional[str]:
+        """
+        Copy the first source that still exists to a new /tmp PNG (callers own and delete
+        it). None if all of them are gone, e.g. evicted from the cache.
+        """
+        tmp_path = f"/tmp/sketch_{uuid.uuid4()}.png"
+        for src in filter(None, sources):
+            try:
+                await asyncio.to_thread(shutil.copyfile, src, tmp_path)
+                return tmp_path
+            except FileNotFoundError:
+                continue
+        return None
+
+    async def _from_cache(self, hit: Dict, prompt: str) -> Optional[Dict]:
+        # Hand out a private copy: callers own (and delete) the local file
+        tmp_path = await self._private_copy(hit["path"])
+        if not tmp_path:
+            return None
+        file_id = str(uuid.uuid4())
+        return {
+            "id": file_id,
+            "path": tmp_path,
+            "storage_path": hit["storage_path"],
+            "url": None,
+            "prompt": prompt,
+            "cached": True,
+            "similarity": hit["similarity"],
+        }
 
     # -------------------------------------------------------------
-    # Batch Generation
+    # Background Upload
     # -------------------------------------------------------------
+    def _start_upload(self, file_id: str, png: bytes, dest: str, cache_key: Optional[str]):
+        async def upload() -> str:
+            try:
+                return await self.storage.upload_bytes_async(png, dest, "image/png")
+            except Exception as e:
+                print(f"Sketch upload failed ({dest}): {e}")
+                if cache_key:
+                    # Don't hand out a storage path that doesn't exist
+                    await asyncio.to_thread(self.cache.discard, cache_key)
+                raise
+
+        task = asyncio.create_task(upload())
+        self._uploads[file_id] = task
+
+        def done(t: asyncio.Task):
+            self._uploads.pop(file_id, None)
+            if not t.cancelled():
+                t.exception()  # Failure already logged; mark it retrieved
+
+        task.add_done_callback(done)
+
+    async def ensure_uploaded(self, sketch: Dict) -> Dict:
+        """
+        Fill in sketch["url"], waiting for the background upload if it is still running.
+        For API callers that need a shareable URL; the render path only needs "path".
+        """
+        if sketch.get("url"):
+            return sketch
+
+        task = self._uploads.get(sketch["id"])
+        if task:
+            sketch["url"] = await asyncio.shield(task)
+        else:
+            sketch["url"] = await self.storage.get_signed_url_async(sketch["storage_path"])
+        return sketch
+
+    async def generate_async(
+        self,
+        description: str,
+        accents: Optional[List[str]] = None,
+        allow_text: bool = True,
+        use_cache: bool = True,
+    ) -> Dict:
+        """
+        Generate a single sketch without blocking the event loop.
+
+        Every FLUX call first takes a slot from the process-wide adaptive rate limiter,
+        so 429s slow the whole process down instead of parking executor threads in
+        time.sleep. Prediction, polling and download are coroutines; only
+        postprocessing leaves the event loop. Bounded by the engine-wide semaphore,
+        so per-scene callers and batches share one limit.
+
+        Cached sketches (same prompt + params, or a near-duplicate description when
+        similarity reuse is enabled) are returned without calling FLUX; identical
+        prompts already in flight share one generation. use_cache=False opts out.
+        """
+        accents = accents or self.default_accents
+        prompt = self.build_prompt(description, accents, allow_text)
+
+        if not use_cache:
+            return await self._generate_uncached(prompt)
+
+        params = {"model": self.model, **self.generation_params}
+        key = SketchCache.make_key(prompt, params)
+        context = SketchCache.make_context(accents, allow_text, params)
+
+        # SQLite + similarity scan: off the event loop
+        hit = await asyncio.to_thread(self.cache.lookup, key, context, description)
+        if hit:
+            sketch = await self._from_cache(hit, prompt)
+            if sketch:
+                return sketch
+            # Evicted between lookup and copy: treat it as a miss
+
+        if key in self._inflight:
+            shared = await asyncio.shield(self._inflight[key])
+            # Same sketch and upload, but a private local copy
+            tmp_path = await self._private_copy(shared.get("path"), self.cache.path_for(key))
+            if tmp_path:
+                return {**shared, "path": tmp_path}
+            # The owner's file and the cache entry are both gone: generate our own
+            return await self._generate_uncached(prompt)
+
+        task = asyncio.ensure_future(
+            self._generate_uncached(prompt, {"key": key, "context": context, "description": description})
+        )
+        self._inflight[key] = task
+        try:
+            # A copy, so joiners still see the shared result if the caller edits ours
+            return dict(await asyncio.shield(task))
+        finally:
+            if task.done():
+                self._inflight.pop(key, None)
+            else:
+                task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+    async def _generate_uncached(self, prompt: str, cache_entry: Optional[Dict] = None) -> Dict:
+        """Rate-limited FLUX generation with retries; see generate_async."""
+
+        max_retries = 20
+        base_delay = 2
+
+        async with self.semaphore:
+            for attempt in range(max_retries):
+                await sketch_rate_limiter.acquire()
+                try:
+                    img_url = await self._predict(prompt)
+                    sketch_rate_limiter.on_success()
+                    break # Success!
+                except Exception as e:
+                    is_rate_limit = _is_rate_limit(e)
+                    if attempt == max_retries - 1:
+                        raise Exception(f"FLUX generation failed after {attempt+1} attempts: {str(e)}")
+                    if is_rate_limit:
+                        # The limiter owns the cooldown; just queue for another slot
+                        sketch_rate_limiter.on_throttle(_retry_after(e))
+                        print(f"Rate limit hit (Attempt {attempt+1}/{max_retries}). Re-queued.")
+                    else:
+                        # Normal error, short retry
+                        delay = min(base_delay * (2 ** attempt), 60)
+                        print(f"Generation error: {e}. Retrying in {delay}s...")
+                        await asyncio.sleep(delay)
+
+            return await self._finish(img_url, prompt, cache_entry)
+
+
     # -------------------------------------------------------------
     # Batch Generation
     # -------------------------------------------------------------
@@ -188,21 +355,16 @@ class SketchEngine:
         Parallel execution with memory safety limits.
         """
 
-        loop = asyncio.get_running_loop()
-        
-        # High Performance Mode: Concurrency 10
-        sem = asyncio.Semaphore(10)
-
         async def run_single(item):
-            async with sem:
-                desc = item.get("description")
-                if not desc:
-                    raise Exception("Batch item missing 'description'")
+            desc = item.get("description")
+            if not desc:
+                raise Exception("Batch item missing 'description'")
 
-                accents = item.get("accents")
-                allow_text = item.get("allow_text", True)
+            accents = item.get("accents")
+            allow_text = item.get("allow_text", True)
+            use_cache = item.get("use_cache", True)
 
-                return await loop.run_in_executor(None, self.generate, desc, accents, allow_text)
+            return await self.generate_async(desc, accents, allow_text, use_cache)
 
         tasks = [run_single(item) for item in items]
 
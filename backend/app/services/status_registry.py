@@ -0,0 +1,202 @@
+import json
+import asyncio
+from typing import AsyncIterator, Dict, Optional, Set
+
+from app import config
+from app.services.storage import StorageManager
+
+TERMINAL_STATES = ("completed", "failed")
+
+CHANNEL_PREFIX = "status:channel:"
+KEY_PREFIX = "status:project:"
+
+
+class StatusRegistry:
+    """
+    Live project status, held in memory and pushed to subscribers.
+
+    Every update replaces the project's status snapshot and is fanned out to its
+    /events subscribers. Terminal states (completed / failed), plus updates made with
+    persist=True (the initial "queued"), are written to projects/{id}/status.json;
+    get() falls back to that file, so a project is never unknown, even after a crash.
+    With a redis_url, snapshots are also kept in Redis (with a TTL) and updates go
+    over pub/sub, so any worker process can serve a project's status and events.
+    Without Redis, live progress is only visible on the worker running the project:
+    multi-worker deployments need REDIS_URL.
+    """
+
+    def __init__(
+        self,
+        storage: Optional[StorageManager] = None,
+        redis_url: Optional[str] = config.REDIS_URL,
+        ttl: int = config.STATUS_TTL_SECONDS,
+    ):
+        self.storage = storage or StorageManager()
+        self.ttl = ttl
+        self._statuses: Dict[str, Dict] = {}
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._listener: Optional[asyncio.Task] = None
+        self._listening = asyncio.Event()  # Set while the pub/sub subscription is live
+
+        self._redis = None
+        if redis_url:
+            import redis.asyncio as aioredis
+            self._redis = aioredis.from_url(redis_url)
+
+        # Metrics
+        self.updates = 0
+        self.durable_writes = 0
+        self.storage_reads = 0
+
+    def _path(self, project_id: str) -> str:
+        return f"projects/{project_id}/status.json"
+
+    # -------------------------------------------------------------
+    # Update / Read
+    # -------------------------------------------------------------
+    async def update(self, project_id: str, status: Dict, persist: bool = False):
+        """Replace the project's status and notify subscribers (terminal states are persisted first)."""
+        status = {"id": project_id, **status}
+        self.updates += 1
+        terminal = status.get("status") in TERMINAL_STATES
+
+        self._statuses[project_id] = status
+        if persist and not terminal:
+            await self.storage.save_json_async(self._path(project_id), status)
+            self.durable_writes += 1
+        elif terminal:
+            # Durable before announcing, so a client reacting to the event can read it back
+            try:
+                await self.storage.save_json_async(self._path(project_id), status)
+                self.durable_writes += 1
+                self._statuses.pop(project_id, None)
+            except Exception as e:
+                # Keep serving it from memory; subscribers still get the final state
+                print(f"[{project_id}] Failed to persist status: {e}")
+
+        if self._redis:
+            try:
+                payload = json.dumps(status)
+                await self._redis.set(KEY_PREFIX + project_id, payload, ex=self.ttl)
+                # Local subscribers hear it back through the listener
+                await self._redis.publish(CHANNEL_PREFIX + project_id, payload)
+                return
+            except Exception as e:
+                print(f"[status] Redis unavailable ({e}), notifying local subscribers only")
+        self._notify(project_id, status)
+
+    async def get(self, project_id: str) -> Optional[Dict]:
+        """Live status from memory (or Redis), else the durable status.json of a finished project."""
+        status = self._statuses.get(project_id)
+        if status:
+            return status
+
+        if self._redis:
+            try:
+                payload = await self._redis.get(KEY_PREFIX + project_id)
+                if payload:
+                    return json.loads(payload)
+            except Exception as e:
+                print(f"[status] Redis unavailable ({e}), reading storage")
+
+        self.storage_reads += 1
+        return await self.storage.get_json_async(self._path(project_id))
+
+    async def forget(self, project_id: str):
+        self._statuses.pop(project_id, None)
+        if self._redis:
+            try:
+                await self._redis.delete(KEY_PREFIX + project_id)
+            except Exception as e:
+                print(f"[status] Redis unavailable ({e})")
+
+    # -------------------------------------------------------------
+    # Subscribe
+    # -------------------------------------------------------------
+    async def subscribe(self, project_id: str, keepalive: Optional[float] = None) -> AsyncIterator[Optional[Dict]]:
+        """
+        Yield the current status, then every update, until a terminal state.
+        With keepalive, after that many idle seconds the snapshot is re-read (catching
+        anything missed while the Redis listener reconnected); None is yielded if it
+        hasn't changed.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        # Register (and be subscribed) before reading the snapshot so no update falls in between
+        self._subscribers.setdefault(project_id, set()).add(queue)
+        if self._redis:
+            self._ensure_listener()
+            try:
+                await asyncio.wait_for(self._listening.wait(), timeout=keepalive)
+            except asyncio.TimeoutError:
+                print("[status] Redis listener not subscribed yet, relying on snapshot re-reads")
+
+        try:
+            status = await self.get(project_id)
+            if status is None:
+                return
+            yield status
+
+            while status.get("status") not in TERMINAL_STATES:
+                try:
+                    status = await asyncio.wait_for(queue.get(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    latest = await self.get(project_id)
+                    if latest and latest != status:
+                        status = latest
+                        yield status
+                    else:
+                        yield None
+                    continue
+                yield status
+        finally:
+            subscribers = self._subscribers.get(project_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[project_id]
+
+    def _notify(self, project_id: str, status: Dict):
+        for queue in self._subscribers.get(project_id, ()):
+            queue.put_nowait(status)
+
+    def _ensure_listener(self):
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+
+    async def _listen(self):
+        """One Redis pub/sub connection per process, fanned out to local subscribers."""
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.psubscribe(CHANNEL_PREFIX + "*")
+                self._listening.set()
+                async for message in pubsub.listen():
+                    if message["type"] != "pmessage":
+                        continue
+                    project_id = message["channel"].decode()[len(CHANNEL_PREFIX):]
+                    self._notify(project_id, json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[status] Redis listener error ({e}), reconnecting")
+                await asyncio.sleep(1)
+            finally:
+                self._listening.clear()
+                await pubsub.close()
+
+    # -------------------------------------------------------------
+    # Metrics
+    # -------------------------------------------------------------
+    def metrics(self) -> Dict:
+        return {
+            "live_projects": len(self._statuses),
+            "subscribers": sum(len(s) for s in self._subscribers.values()),
+            "updates": self.updates,
+            "durable_writes": self.durable_writes,
+            "storage_reads": self.storage_reads,
+            "redis": self._redis is not None,
+        }
+
+
+# One registry per process, shared by the pipeline and the status routes
+status_registry = StatusRegistry()
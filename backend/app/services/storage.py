@@ -1,54 +1,357 @@
 import os
-from supabase import create_client, Client
+import json
+import asyncio
+import mimetypes
+import threading
+from concurrent.futures import Future
+from typing import Optional
+
+import aiofiles
+import httpx
+
+from app import config
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+SIGNED_URL_EXPIRY = 604800   # 7 days
 
 
-class StorageManager:
-    def __init__(self, bucket_name: str = "sketchcourse"):
-        self.bucket = bucket_name
+# -------------------------------------------------------------
+# I/O loop
+# -------------------------------------------------------------
+class _IOLoop:
+    """
+    One background event-loop thread that runs all storage I/O.
 
-    def upload_file(self, file_path: str, dest_path: str) -> str:
-        with open(file_path, "rb") as f:
-            res = supabase.storage.from_(self.bucket).upload(dest_path, f)
+    The pooled HTTP client lives on this loop, so the same connections serve async
+    callers (on any loop), worker threads and plain sync code, and a slow upload never
+    blocks the app's event loop.
+    """
 
-        if "error" in str(res).lower():
-            raise Exception(f"Upload failed: {res}")
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
 
-        # Return public signed URL
-        signed = supabase.storage.from_(self.bucket).create_signed_url(
-            dest_path, expires_in=604800   # 7 days
-        )
-        return signed["signedURL"]
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="storage-io", daemon=True).start()
+                self._loop = loop
+        return self._loop
 
-    def download_file(self, src_path: str, dest_path: str):
-        data = supabase.storage.from_(self.bucket).download(src_path)
-        with open(dest_path, "wb") as f:
-            f.write(data)
+    def submit(self, coro) -> Future:
+        return asyncio.run_coroutine_threadsafe(coro, self._get_loop())
 
-    def delete_file(self, path: str):
-        supabase.storage.from_(self.bucket).remove(path)
+    async def run(self, coro):
+        return await asyncio.wrap_future(self.submit(coro))
 
-    def save_json(self, path: str, data: dict):
-        import json
-        json_str = json.dumps(data)
-        # Upload as string
-        res = supabase.storage.from_(self.bucket).upload(
-            path, 
-            json_str.encode(), 
-            {"content-type": "application/json", "upsert": "true"}
+    def run_sync(self, coro):
+        return self.submit(coro).result()
+
+
+_io = _IOLoop()
+
+
+async def _file_chunks(path: str, chunk_size: int = config.UPLOAD_CHUNK_SIZE):
+    async with aiofiles.open(path, "rb") as f:
+        while True:
+            chunk = await f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+# -------------------------------------------------------------
+# Backends (coroutines run on the I/O loop)
+# -------------------------------------------------------------
+class SupabaseStorageBackend:
+    """
+    Supabase Storage over its REST API with a pooled httpx client.
+
+    Files are streamed from disk in UPLOAD_CHUNK_SIZE chunks. Files of at least
+    STORAGE_MULTIPART_THRESHOLD go through Supabase's S3 endpoint as a multipart
+    upload with STORAGE_UPLOAD_CONCURRENCY parts in flight, when S3 keys are configured.
+    Both paths reject an existing object unless upsert is set.
+    """
+
+    def __init__(self, url: str = SUPABASE_URL, key: str = SUPABASE_KEY):
+        if not url or not key:
+            raise RuntimeError("SUPABASE_URL and SUPABASE_SERVICE_KEY must be set (or use STORAGE_BACKEND=local)")
+        self.base_url = f"{url.rstrip('/')}/storage/v1"
+        self.headers = {"Authorization": f"Bearer {key}", "apikey": key}
+        self._client: Optional[httpx.AsyncClient] = None
+        self._s3 = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                limits=httpx.Limits(
+                    max_connections=config.STORAGE_MAX_CONNECTIONS,
+                    max_keepalive_connections=config.STORAGE_MAX_CONNECTIONS,
+                ),
+                timeout=httpx.Timeout(config.STORAGE_TIMEOUT, connect=10.0),
+            )
+        return self._client
+
+    async def _post_object(self, bucket: str, dest_path: str, content, headers: dict):
+        res = await self._get_client().post(f"/object/{bucket}/{dest_path}", content=content, headers=headers)
+        if res.status_code >= 400:
+            raise Exception(f"Upload failed: {res.status_code} {res.text}")
+
+    @staticmethod
+    def _upload_headers(content_type: str, upsert: bool, cache_control: Optional[str]) -> dict:
+        headers = {"content-type": content_type, "x-upsert": "true" if upsert else "false"}
+        if cache_control is not None:
+            headers["cache-control"] = f"max-age={cache_control}"
+        return headers
+
+    async def upload_bytes(self, bucket, data: bytes, dest_path, content_type, upsert=False, cache_control=None):
+        await self._post_object(bucket, dest_path, data, self._upload_headers(content_type, upsert, cache_control))
+
+    async def upload_file(self, bucket, file_path, dest_path, content_type, upsert=False):
+        size = os.path.getsize(file_path)
+        if self.uses_multipart(size):
+            await asyncio.to_thread(self._multipart_upload, bucket, file_path, dest_path, content_type, upsert)
+            return
+
+        headers = self._upload_headers(content_type, upsert, None)
+        headers["content-length"] = str(size)
+        await self._post_object(bucket, dest_path, _file_chunks(file_path), headers)
+
+    @staticmethod
+    def uses_multipart(size: int) -> bool:
+        return size >= config.STORAGE_MULTIPART_THRESHOLD and bool(config.SUPABASE_S3_ACCESS_KEY_ID)
+
+    def _multipart_upload(self, bucket, file_path, dest_path, content_type, upsert=False):
+        import boto3
+        from boto3.s3.transfer import TransferConfig
+        from botocore.config import Config
+        from botocore.exceptions import ClientError
+
+        if self._s3 is None:
+            self._s3 = boto3.client(
+                "s3",
+                endpoint_url=f"{self.base_url}/s3",
+                region_name=config.SUPABASE_S3_REGION,
+                aws_access_key_id=config.SUPABASE_S3_ACCESS_KEY_ID,
+                aws_secret_access_key=config.SUPABASE_S3_SECRET_ACCESS_KEY,
+                # Supabase's S3 endpoint only supports path-style requests
+                config=Config(s3={"addressing_style": "path"}),
+            )
+
+        if not upsert:
+            # S3 PUTs always overwrite: match the REST path, which rejects existing objects
+            # (best effort - a concurrent writer can still slip in between)
+            try:
+                self._s3.head_object(Bucket=bucket, Key=dest_path)
+            except ClientError as e:
+                if e.response.get("Error", {}).get("Code") not in ("404", "NoSuchKey", "NotFound"):
+                    raise
+            else:
+                raise Exception(f"Upload failed: {dest_path} already exists")
+
+        self._s3.upload_file(
+            file_path,
+            bucket,
+            dest_path,
+            ExtraArgs={"ContentType": content_type},
+            Config=TransferConfig(
+                multipart_threshold=config.STORAGE_MULTIPART_THRESHOLD,
+                multipart_chunksize=config.STORAGE_PART_SIZE,
+                max_concurrency=config.STORAGE_UPLOAD_CONCURRENCY,
+            ),
         )
-        if "error" in str(res).lower():
-            raise Exception(f"Upload failed: {res}")
 
-    def get_json(self, path: str) -> dict:
-        import json
+    async def download(self, bucket, path) -> bytes:
+        res = await self._get_client().get(f"/object/{bucket}/{path}")
+        if res.status_code >= 400:
+            raise Exception(f"Download failed: {res.status_code} {res.text}")
+        return res.content
+
+    async def delete(self, bucket, path):
+        res = await self._get_client().request("DELETE", f"/object/{bucket}", json={"prefixes": [path]})
+        if res.status_code >= 400:
+            raise Exception(f"Delete failed: {res.status_code} {res.text}")
+
+    async def sign(self, bucket, path, expires_in: int) -> str:
+        res = await self._get_client().post(f"/object/sign/{bucket}/{path}", json={"expiresIn": expires_in})
+        if res.status_code >= 400:
+            raise Exception(f"Signing failed: {res.status_code} {res.text}")
+        return f"{self.base_url}{res.json()['signedURL']}"
+
+
+class LocalStorageBackend:
+    """
+    Filesystem stand-in (root/bucket/path) for offline development and benchmarks.
+    latency adds a simulated round trip to every request.
+    """
+
+    def __init__(self, root: str = config.LOCAL_STORAGE_ROOT, latency: float = config.LOCAL_STORAGE_LATENCY_MS / 1000):
+        self.root = root
+        self.latency = latency
+
+    def _path(self, bucket, path) -> str:
+        full = os.path.join(self.root, bucket, path)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        return full
+
+    async def _round_trip(self):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def _check_exists(self, full: str, upsert: bool):
+        if not upsert and os.path.exists(full):
+            raise Exception(f"Upload failed: {full} already exists")
+
+    async def upload_bytes(self, bucket, data: bytes, dest_path, content_type, upsert=False, cache_control=None):
+        await self._round_trip()
+        full = self._path(bucket, dest_path)
+        self._check_exists(full, upsert)
+        async with aiofiles.open(full, "wb") as f:
+            await f.write(data)
+
+    async def upload_file(self, bucket, file_path, dest_path, content_type, upsert=False):
+        await self._round_trip()
+        full = self._path(bucket, dest_path)
+        self._check_exists(full, upsert)
+        async with aiofiles.open(full, "wb") as f:
+            async for chunk in _file_chunks(file_path):
+                await f.write(chunk)
+
+    async def download(self, bucket, path) -> bytes:
+        await self._round_trip()
+        async with aiofiles.open(os.path.join(self.root, bucket, path), "rb") as f:
+            return await f.read()
+
+    async def delete(self, bucket, path):
+        await self._round_trip()
+        full = os.path.join(self.root, bucket, path)
+        if os.path.exists(full):
+            os.remove(full)
+
+    async def sign(self, bucket, path, expires_in: int) -> str:
+        return f"file://{os.path.abspath(os.path.join(self.root, bucket, path))}"
+
+
+_backend = None
+
+
+def get_storage_backend():
+    """Process-wide storage backend, chosen by STORAGE_BACKEND."""
+    global _backend
+    if _backend is None:
+        if config.STORAGE_BACKEND == "local":
+            _backend = LocalStorageBackend()
+        elif config.STORAGE_BACKEND == "supabase":
+            _backend = SupabaseStorageBackend()
+        else:
+            raise ValueError(f"Unknown storage backend: {config.STORAGE_BACKEND}")
+    return _backend
+
+
+# -------------------------------------------------------------
+# Storage manager
+# -------------------------------------------------------------
+class StorageManager:
+    """
+    Bucket storage. Every operation has an async form (*_async, safe to await on any
+    event loop) and a sync form for threads and sync code; both run on the shared I/O loop.
+    """
+
+    def __init__(self, bucket_name: str = "sketchcourse", backend=None):
+        self.bucket = bucket_name
+        self._backend = backend
+
+    @property
+    def backend(self):
+        # Resolved lazily so importing a route doesn't need storage credentials
+        if self._backend is None:
+            self._backend = get_storage_backend()
+        return self._backend
+
+    # I/O loop coroutines
+    async def _upload_file(self, file_path, dest_path, upsert, content_type) -> str:
+        content_type = content_type or mimetypes.guess_type(dest_path)[0] or "application/octet-stream"
+        await self.backend.upload_file(self.bucket, file_path, dest_path, content_type, upsert)
+        return await self.backend.sign(self.bucket, dest_path, SIGNED_URL_EXPIRY)
+
+    async def _upload_bytes(self, data, dest_path, content_type, upsert, cache_control) -> str:
+        await self.backend.upload_bytes(self.bucket, data, dest_path, content_type, upsert, cache_control)
+        return await self.backend.sign(self.bucket, dest_path, SIGNED_URL_EXPIRY)
+
+    async def _download_file(self, src_path, dest_path):
+        data = await self.backend.download(self.bucket, src_path)
+        async with aiofiles.open(dest_path, "wb") as f:
+            await f.write(data)
+
+    async def _get_json(self, path) -> Optional[dict]:
         try:
-            data = supabase.storage.from_(self.bucket).download(path)
-            return json.loads(data)
+            return json.loads(await self.backend.download(self.bucket, path))
         except Exception as e:
             print(f"Error reading JSON {path}: {e}")
             return None
+
+    def _json_bytes(self, data: dict) -> bytes:
+        return json.dumps(data).encode()
+
+    # Async API
+    async def upload_file_async(self, file_path: str, dest_path: str, upsert: bool = False, content_type: str = None) -> str:
+        return await _io.run(self._upload_file(file_path, dest_path, upsert, content_type))
+
+    async def upload_bytes_async(
+        self,
+        data: bytes,
+        dest_path: str,
+        content_type: str = "application/octet-stream",
+        upsert: bool = False,
+        cache_control: str = None,
+    ) -> str:
+        return await _io.run(self._upload_bytes(data, dest_path, content_type, upsert, cache_control))
+
+    async def get_signed_url_async(self, path: str) -> str:
+        return await _io.run(self.backend.sign(self.bucket, path, SIGNED_URL_EXPIRY))
+
+    async def download_file_async(self, src_path: str, dest_path: str):
+        await _io.run(self._download_file(src_path, dest_path))
+
+    async def delete_file_async(self, path: str):
+        await _io.run(self.backend.delete(self.bucket, path))
+
+    async def save_json_async(self, path: str, data: dict):
+        await _io.run(self.backend.upload_bytes(self.bucket, self._json_bytes(data), path, "application/json", True))
+
+    async def get_json_async(self, path: str) -> Optional[dict]:
+        return await _io.run(self._get_json(path))
+
+    # Sync wrappers
+    def upload_file(self, file_path: str, dest_path: str, upsert: bool = False, content_type: str = None) -> str:
+        return _io.run_sync(self._upload_file(file_path, dest_path, upsert, content_type))
+
+    def upload_bytes(
+        self,
+        data: bytes,
+        dest_path: str,
+        content_type: str = "application/octet-stream",
+        upsert: bool = False,
+        cache_control: str = None,
+    ) -> str:
+        return _io.run_sync(self._upload_bytes(data, dest_path, content_type, upsert, cache_control))
+
+    def get_signed_url(self, path: str) -> str:
+        return _io.run_sync(self.backend.sign(self.bucket, path, SIGNED_URL_EXPIRY))
+
+    def download_file(self, src_path: str, dest_path: str):
+        _io.run_sync(self._download_file(src_path, dest_path))
+
+    def delete_file(self, path: str):
+        _io.run_sync(self.backend.delete(self.bucket, path))
+
+    def save_json(self, path: str, data: dict):
+        _io.run_sync(self.backend.upload_bytes(self.bucket, self._json_bytes(data), path, "application/json", True))
+
+    def get_json(self, path: str) -> Optional[dict]:
+        return _io.run_sync(self._get_json(path))
@@ -1,18 +1,12 @@
-import os
 import json
-from typing import Dict, List, Union
-from openai import OpenAI
+from typing import AsyncIterator, Dict, List, Union
+from app import config
+from app.utils.ai_client import chat_completion, stream_chat_completion
+from app.utils.json_stream import JSONArrayStreamParser
+from app.utils.validators import fill_scene, normalize_scene, normalize_storyboard
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-class StoryboardGenerator:
-
-    def generate_storyboard(self, input_data: Union[Dict, str]) -> Dict:
-        """
-        Generates a scene-by-scene storyboard from either an outline (dict) or raw text (str).
-        """
-        
-        SYSTEM_MSG = """
+STORYBOARD_SYSTEM_MSG = """
         You are an expert educational content creator for TikTok/YouTube Shorts.
         Your goal is to turn the input content into a fast-paced, visually engaging video script.
 
@@ -39,6 +33,26 @@ class StoryboardGenerator:
         }
         """
 
+
+def parse_storyboard(raw: str, strict: bool = True) -> Dict:
+    """
+    Parse + normalise a storyboard reply, tolerating text around the JSON object.
+    strict (fused mode) fully normalises scenes; two_pass only fills missing fields.
+    """
+    try:
+        data = json.loads(raw)
+    except json.JSONDecodeError:
+        data = json.loads(raw[raw.index("{"): raw.rindex("}")+1])
+    return normalize_storyboard(data, strict)
+
+
+class StoryboardGenerator:
+
+    def __init__(self, llm_client=None):
+        # None -> the shared process-wide AsyncOpenAI client
+        self.client = llm_client
+
+    def _build_messages(self, input_data: Union[Dict, str]) -> List[Dict]:
         content_str = json.dumps(input_data) if isinstance(input_data, dict) else input_data[:15000]
 
         USER_MSG = f"""
@@ -47,26 +61,103 @@ class StoryboardGenerator:
         {content_str}
         """
 
+        return [
+            {"role": "system", "content": STORYBOARD_SYSTEM_MSG},
+            {"role": "user", "content": USER_MSG},
+        ]
+
+    def _build_fused_messages(self, text: str, target_duration_minutes: int) -> List[Dict]:
+        """Single-pass prompt: source text straight to the final storyboard schema."""
+        USER_MSG = f"""
+        Create a short video storyboard directly from this source text.
+
+        Source Text:
+        {text[:20000]}
+
+        Target Duration: {target_duration_minutes} minutes.
+        Explain the core concepts efficiently. Every scene must have narration,
+        visual_prompt, text_overlay, accents and duration_seconds.
+        """
+
+        return [
+            {"role": "system", "content": STORYBOARD_SYSTEM_MSG},
+            {"role": "user", "content": USER_MSG},
+        ]
+
+    async def generate_storyboard(self, input_data: Union[Dict, str], use_cache: bool = True) -> Dict:
+        """
+        Generates a scene-by-scene storyboard from either an outline (dict) or raw text (str).
+        """
+        return await self._complete(self._build_messages(input_data), use_cache, strict=False)
+
+    async def generate_fused_storyboard(self, text: str, target_duration_minutes: int = 3, use_cache: bool = True) -> Dict:
+        """
+        Fused script+storyboard mode: one LLM call from source text to the final schema.
+        """
+        return await self._complete(self._build_fused_messages(text, target_duration_minutes), use_cache, strict=True)
+
+    async def _complete(self, messages: List[Dict], use_cache: bool, strict: bool) -> Dict:
+        for attempt in range(config.LLM_PARSE_RETRIES + 1):
+            try:
+                # Only parsed replies are cached; retries skip the cache
+                return await chat_completion(
+                    self.client,
+                    model="gpt-4o",
+                    response_format={"type": "json_object"},
+                    messages=messages,
+                    temperature=0.7,
+                    use_cache=use_cache and attempt == 0,
+                    parse=lambda raw: parse_storyboard(raw, strict)
+                )
+            except Exception as e:
+                print(f"Error generating storyboard: {e}")
+                if attempt == config.LLM_PARSE_RETRIES:
+                    raise e
+
+    async def stream_storyboard(self, input_data: Union[Dict, str], use_cache: bool = True) -> AsyncIterator[Dict]:
+        """
+        Streaming mode: yields each scene dict as soon as it is complete in the
+        streamed completion, so downstream sketch/TTS work can start on scene 1
+        while the model is still writing the rest.
+        """
+        async for scene in self._stream_scenes(self._build_messages(input_data), use_cache, strict=False):
+            yield scene
+
+    async def stream_fused_storyboard(self, text: str, target_duration_minutes: int = 3, use_cache: bool = True) -> AsyncIterator[Dict]:
+        """Streaming variant of generate_fused_storyboard."""
+        messages = self._build_fused_messages(text, target_duration_minutes)
+        async for scene in self._stream_scenes(messages, use_cache, strict=True):
+            yield scene
+
+    async def _stream_scenes(self, messages: List[Dict], use_cache: bool, strict: bool) -> AsyncIterator[Dict]:
+        parser = JSONArrayStreamParser("scenes")
+        scene_fn = normalize_scene if strict else fill_scene
+        parts = []
+        emitted = 0
+
+        async for delta in stream_chat_completion(
+            self.client,
+            model="gpt-4o",
+            response_format={"type": "json_object"},
+            messages=messages,
+            temperature=0.7,
+            use_cache=use_cache,
+            validate=lambda raw: parse_storyboard(raw, strict)
+        ):
+            parts.append(delta)
+            for scene in parser.feed(delta):
+                yield scene_fn(scene, emitted)
+                emitted += 1
+
+        if emitted:
+            return
+
+        # Nothing parsed incrementally (unexpected shape) - fall back to the full document
+        raw = "".join(parts)
         try:
-            response = client.chat.completions.create(
-                model="gpt-4o",
-                response_format={"type": "json_object"},
-                messages=[
-                    {"role": "system", "content": SYSTEM_MSG},
-                    {"role": "user", "content": USER_MSG},
-                ],
-                temperature=0.7
-            )
-
-            raw = response.choices[0].message.content
-            return json.loads(raw)
+            storyboard = parse_storyboard(raw, strict)
         except Exception as e:
-            print(f"Error generating storyboard: {e}")
-            # Fallback for JSON parsing errors
-            if 'raw' in locals():
-                try:
-                    json_str = raw[raw.index("{"): raw.rindex("}")+1]
-                    return json.loads(json_str)
-                except:
-                    pass
+            print(f"Error parsing streamed storyboard: {e}")
             raise e
+        for scene in storyboard["scenes"]:
+            yield scene
@@ -1,35 +1,82 @@
-import os
 import uuid
-from openai import OpenAI
+import asyncio
+from dataclasses import dataclass
+from typing import Optional
 from app.services.storage import StorageManager
+from app.services.audio_cache import AudioCache
+from app.utils.ai_client import get_openai_client
+from app.utils.mp3 import mp3_duration
+
+# Shared by every TTSEngine so identical lines hit across projects
+audio_cache = AudioCache()
+
+
+@dataclass
+class AudioClip:
+    path: str                       # local MP3, owned by the caller
+    duration: Optional[float]       # seconds, None if it couldn't be measured
+    cached: bool = False
+
 
 class TTSEngine:
-    def __init__(self):
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    def __init__(self, llm_client=None):
+        # None -> the shared process-wide AsyncOpenAI client
+        self._client = llm_client
         self.storage = StorageManager()
+        self.cache = audio_cache
+        self.model = "tts-1"
         self.voice = "alloy" # Options: alloy, echo, fable, onyx, nova, shimmer
 
-    def generate_audio(self, text: str) -> str:
+    @property
+    def client(self):
+        return self._client or get_openai_client()
+
+    async def generate_clip(self, text: str, use_cache: bool = True) -> Optional[AudioClip]:
         """
-        Generates audio from text using OpenAI TTS.
-        Returns local path to the audio file.
+        Generates narration audio with OpenAI TTS, served from the audio cache when the
+        same (model, voice, text) was synthesised before.
+        Returns an AudioClip (local path + duration), or None on failure.
         """
         if not text:
             return None
 
+        key = AudioCache.make_key(self.model, self.voice, text)
+        if use_cache:
+            hit = await asyncio.to_thread(self.cache.get, key)
+            if hit:
+                path, duration = hit
+                if duration is None:
+                    duration = await asyncio.to_thread(mp3_duration, path)
+                return AudioClip(path=path, duration=duration, cached=True)
+
         try:
-            response = self.client.audio.speech.create(
-                model="tts-1",
-                voice=self.voice,
-                input=text
-            )
-            
             file_id = str(uuid.uuid4())
             tmp_path = f"/tmp/audio_{file_id}.mp3"
-            
-            response.stream_to_file(tmp_path)
-            return tmp_path
-            
+
+            async with self.client.audio.speech.with_streaming_response.create(
+                model=self.model,
+                voice=self.voice,
+                input=text
+            ) as response:
+                await response.stream_to_file(tmp_path)
+
         except Exception as e:
             print(f"TTS Error: {e}")
             return None
+
+        # Parsed from the MP3 frame headers, so nothing downstream needs ffprobe
+        duration = await asyncio.to_thread(mp3_duration, tmp_path)
+        try:
+            await asyncio.to_thread(self.cache.put, key, tmp_path, duration)
+        except Exception as e:
+            print(f"TTS cache write failed: {e}")
+
+        return AudioClip(path=tmp_path, duration=duration)
+
+    async def generate_audio(self, text: str) -> str:
+        """
+        Generates audio from text using OpenAI TTS.
+        Returns local path to the audio file.
+        """
+        clip = await self.generate_clip(text)
+        return clip.path if clip else None
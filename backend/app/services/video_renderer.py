@@ -1,25 +1,124 @@
 import os
 import uuid
 import ffmpeg
-from typing import List
+from typing import Dict, List, Tuple
+from app import config
 from app.services.scene_model import Scene
+from app.services.motion import fit_size, render_frames, source_size, zoompan_args
+from app.utils.mp3 import mp3_duration
+from app.utils.ffmpeg_utils import RenderCancelled, cancel_requested, probe_duration, wait_cancellable
+
+# FLUX sketches are generated at 1024x768
+SKETCH_ASPECT = 4 / 3
+
+
+def _even(value: float) -> int:
+    """Round to an even pixel count (yuv420p needs even dimensions)."""
+    return max(2, int(round(value / 2)) * 2)
+
 
 class VideoRenderer:
 
-    def __init__(self):
-        self.output_width = 1280
-        self.output_height = 720
+    def __init__(self, motion_backend: str = None, threads: int = None, profile: str = "final"):
+        # Encoder profile ("draft" preview / "final"), see config.RENDER_PROFILES
+        if profile not in config.RENDER_PROFILES:
+            raise ValueError(f"Unknown render profile: {profile}")
+        self.profile = profile
+        settings = config.RENDER_PROFILES[profile]
+        self.output_width = settings["width"]
+        self.output_height = settings["height"]
+        self.fps = settings["fps"]
+        self.preset = settings["preset"]
+        self.crf = settings["crf"]
+        # Drafts skip Ken Burns moves: identical frames are nearly free to encode
+        self.simple_motion = settings["simple_motion"]
+        # Overlay text is sized for 720p
+        self.text_scale = self.output_height / 720
+        # Keyframe every 2 s, so clips can be cut into short HLS segments without re-encoding
+        self.gop = self.fps * 2
+        # Encoder thread budget per ffmpeg process (see RenderScheduler)
+        self.threads = threads or config.RENDER_THREADS_PER_ENCODE
+        # "pil": precomputed crop boxes, frames piped to the encoder; "zoompan": ffmpeg filter
+        self.motion_backend = motion_backend or config.MOTION_BACKEND
+        if self.motion_backend not in config.MOTION_BACKENDS:
+            raise ValueError(f"Unknown motion backend: {self.motion_backend}")
         # Fallback font, might need to be adjusted based on deployment env
         self.font_path = "/System/Library/Fonts/Helvetica.ttc" if os.path.exists("/System/Library/Fonts/Helvetica.ttc") else "arial"
 
+    def encoder_settings(self) -> dict:
+        """Everything besides the scene inputs that affects a rendered clip (clip cache key)."""
+        return {
+            "size": [self.output_width, self.output_height],
+            "fps": self.fps,
+            "gop": self.gop,
+            "motion_backend": self.motion_backend,
+            "vcodec": "libx264",
+            "preset": self.preset,
+            "crf": self.crf,
+            "simple_motion": self.simple_motion,
+            "pix_fmt": "yuv420p",
+            "acodec": "aac",
+            "font": self.font_path,
+            "framing": "pillarbox",
+        }
+
     def get_audio_duration(self, audio_path: str) -> float:
-        """Get duration of audio file in seconds."""
-        try:
-            probe = ffmpeg.probe(audio_path)
-            return float(probe['format']['duration'])
-        except Exception as e:
-            print(f"Error probing audio: {e}")
-            return 5.0
+        """Get duration of audio file in seconds (MP3 headers in-process, else ffprobe)."""
+        duration = mp3_duration(audio_path) if audio_path.endswith(".mp3") else None
+        if duration is None:
+            duration = probe_duration(audio_path)
+        return duration if duration is not None else 5.0
+
+    def scene_duration(self, scene: Scene) -> float:
+        """Scene length: scene.duration, stretched to fit the narration (plus a small buffer)."""
+        duration = scene.duration
+        if scene.audio_path and os.path.exists(scene.audio_path):
+            # Measured at TTS time; only probe for audio that came from elsewhere
+            audio_dur = scene.audio_duration or self.get_audio_duration(scene.audio_path)
+            # Add small buffer for pacing
+            duration = max(duration, audio_dur + 0.5)
+        return duration
+
+    def _motion(self, scene: Scene) -> str:
+        return "static" if self.simple_motion else scene.motion
+
+    def _zoompan(self, scene: Scene, n_frames: int, out_size: Tuple[int, int]):
+        """
+        zoompan at the sketch's own aspect, pillarboxed (white) to out_size: the same
+        framing as the pil backend. One input frame is expanded to n_frames (looping
+        the still would run zoompan once per input frame).
+        """
+        inner_w, inner_h = fit_size(source_size(scene.sketch_path), out_size)
+        video = ffmpeg.input(scene.sketch_path).filter(
+            'zoompan',
+            d=n_frames,
+            s=f'{inner_w}x{inner_h}',
+            fps=self.fps,
+            **zoompan_args(self._motion(scene), n_frames),
+        )
+        if (inner_w, inner_h) != tuple(out_size):
+            video = video.filter('pad', out_size[0], out_size[1], '(ow-iw)/2', '(oh-ih)/2', color='white')
+        return video
+
+    def _overlay_text(self, video, text: str, enable: str = None, scale: float = None, y: str = None):
+        if not text:
+            return video
+        scale = scale or self.text_scale
+        # Escape text for ffmpeg
+        safe_text = text.replace(":", "\:").replace("'", "")
+        kwargs = {"enable": enable} if enable else {}
+        return video.drawtext(
+            text=safe_text,
+            fontfile=self.font_path,
+            fontsize=round(48 * scale),
+            fontcolor='black',
+            x='(w-text_w)/2',
+            y=y or f'h-{round(80 * scale)}', # Bottom centered
+            box=1,
+            boxcolor='white@0.8',
+            boxborderw=max(1, round(10 * scale)),
+            **kwargs
+        )
 
     def render_scene(self, scene: Scene) -> str:
         """
@@ -30,69 +129,24 @@ class VideoRenderer:
         tmp_id = str(uuid.uuid4())
         output_path = f"/tmp/scene_{tmp_id}.mp4"
 
-        # Determine duration
-        duration = scene.duration
-        if scene.audio_path and os.path.exists(scene.audio_path):
-            audio_dur = self.get_audio_duration(scene.audio_path)
-            # Add small buffer for pacing
-            duration = max(duration, audio_dur + 0.5)
+        duration = self.scene_duration(scene)
+        n_frames = int(round(duration * self.fps))
+        out_size = (self.output_width, self.output_height)
 
-        # Input Image
-        input_stream = ffmpeg.input(scene.sketch_path, loop=1, t=duration)
-        
-        # Motion Effect (Randomized Ken Burns)
-        import random
-        
-        # Randomize zoom direction (in or out)
-        zoom_direction = random.choice(["in", "out"])
-        
-        # Randomize pan direction (none, left, right, up, down)
-        pan_direction = random.choice(["none", "left", "right", "up", "down"])
-        
-        # Base zoom expression
-        if zoom_direction == "in":
-            z_expr = "min(zoom+0.0015,1.5)"
+        # Motion Effect (named Ken Burns move, see app/services/motion.py)
+        if self.motion_backend == "pil":
+            video = ffmpeg.input(
+                'pipe:',
+                format='rawvideo',
+                pix_fmt='rgb24',
+                s=f'{self.output_width}x{self.output_height}',
+                framerate=self.fps,
+            )
         else:
-            z_expr = "max(1.5-0.0015*on,1)"
-            
-        # Pan expressions (x and y coordinates)
-        # Center by default
-        x_expr = "iw/2-(iw/zoom/2)"
-        y_expr = "ih/2-(ih/zoom/2)"
-        
-        if pan_direction == "left":
-            x_expr = "x+1" # Move viewport right = pan left
-        elif pan_direction == "right":
-            x_expr = "x-1"
-        elif pan_direction == "up":
-            y_expr = "y+1"
-        elif pan_direction == "down":
-            y_expr = "y-1"
-
-        video = input_stream.filter(
-            'zoompan',
-            z=z_expr,
-            d=int(duration * 25), # 25 fps
-            x=x_expr,
-            y=y_expr,
-            s=f'{self.output_width}x{self.output_height}'
-        )
+            video = self._zoompan(scene, n_frames, out_size)
 
         # Text Overlay
-        if scene.text:
-            # Escape text for ffmpeg
-            safe_text = scene.text.replace(":", "\:").replace("'", "")
-            video = video.drawtext(
-                text=safe_text,
-                fontfile=self.font_path,
-                fontsize=48,
-                fontcolor='black',
-                x='(w-text_w)/2',
-                y='h-80', # Bottom centered
-                box=1,
-                boxcolor='white@0.8',
-                boxborderw=10
-            )
+        video = self._overlay_text(video, scene.text)
 
         # Audio
         audio = None
@@ -111,16 +165,233 @@ class VideoRenderer:
                 vcodec='libx264',
                 acodec='aac',
                 pix_fmt='yuv420p',
-                r=25,
-                preset='ultrafast',
+                r=self.fps,
+                preset=self.preset,
+                crf=self.crf,
+                g=self.gop,
+                threads=self.threads,
                 shortest=None
             )
-            out.run(overwrite_output=True, quiet=True)
+            if self.motion_backend == "pil":
+                frames = render_frames(scene.sketch_path, self._motion(scene), duration, self.fps, out_size)
+                self._run_piped(out, frames)
+            else:
+                self._run(out)
             return output_path
         except ffmpeg.Error as e:
             print(f"FFmpeg Error: {e.stderr.decode() if e.stderr else str(e)}")
             raise e
 
+    def aspect_size(self, aspect: str) -> Tuple[int, int]:
+        """Output size for an aspect at this profile's resolution (the short side is kept)."""
+        ratio_w, ratio_h = config.OUTPUT_ASPECTS[aspect]
+        short = min(self.output_width, self.output_height)
+        if ratio_w >= ratio_h:
+            width, height = short * ratio_w / ratio_h, short
+        else:
+            width, height = short, short * ratio_h / ratio_w
+        return _even(width), _even(height)
+
+    def render_scene_multi(self, scene: Scene, aspects: List[str]) -> Dict[str, str]:
+        """
+        Render one scene in several aspect ratios from a single ffmpeg graph.
+
+        The sketch is decoded and the motion computed once, on a master stream in the
+        sketch's own 4:3 aspect; split fans it out per aspect - pillarboxed when the
+        aspect is wider than the sketch (landscape, as in render_scene), else a centre
+        crop + scale - each with its own overlay placement and encoder. Returns {aspect: clip path}.
+        """
+        for aspect in aspects:
+            if aspect not in config.OUTPUT_ASPECTS:
+                raise ValueError(f"Unknown output aspect: {aspect}")
+
+        duration = self.scene_duration(scene)
+        n_frames = int(round(duration * self.fps))
+
+        # Master: 4:3, a third taller than the profile so the narrow crops keep detail
+        master_h = _even(self.output_height * 4 / 3)
+        master_w = _even(master_h * SKETCH_ASPECT)
+        master_size = (master_w, master_h)
+
+        if self.motion_backend == "pil":
+            master = ffmpeg.input(
+                'pipe:', format='rawvideo', pix_fmt='rgb24', s=f'{master_w}x{master_h}', framerate=self.fps
+            )
+        else:
+            master = self._zoompan(scene, n_frames, master_size)
+        branches = master.filter_multi_output('split', len(aspects))
+
+        if scene.audio_path and os.path.exists(scene.audio_path):
+            audio = ffmpeg.input(scene.audio_path)
+        else:
+            audio = ffmpeg.input('anullsrc', f='lavfi', t=duration)
+
+        outputs = []
+        paths = {}
+        for i, aspect in enumerate(aspects):
+            out_w, out_h = self.aspect_size(aspect)
+            if out_w / out_h > master_w / master_h:
+                # Wider than the sketch (landscape): pillarbox, like render_scene
+                fit_w, fit_h = fit_size(master_size, (out_w, out_h))
+                video = (
+                    branches[i]
+                    .filter('scale', fit_w, fit_h)
+                    .filter('pad', out_w, out_h, '(ow-iw)/2', '(oh-ih)/2', color='white')
+                )
+            else:
+                crop_w = min(master_w, master_h * out_w / out_h)
+                crop_h = crop_w * out_h / out_w
+                video = (
+                    branches[i]
+                    .filter('crop', _even(crop_w), _even(crop_h))
+                    .filter('scale', out_w, out_h)
+                )
+            # Vertical video: keep captions clear of the Shorts/Reels UI at the bottom
+            vertical = out_h > out_w
+            video = self._overlay_text(
+                video,
+                scene.text,
+                scale=min(out_w, out_h) / 720,
+                y='h*0.72' if vertical else None,
+            )
+
+            paths[aspect] = f"/tmp/scene_{uuid.uuid4()}_{aspect}.mp4"
+            outputs.append(ffmpeg.output(
+                video,
+                audio,
+                paths[aspect],
+                vcodec='libx264',
+                acodec='aac',
+                pix_fmt='yuv420p',
+                r=self.fps,
+                preset=self.preset,
+                crf=self.crf,
+                g=self.gop,
+                threads=self.threads,
+                shortest=None
+            ))
+
+        try:
+            out = ffmpeg.merge_outputs(*outputs)
+            if self.motion_backend == "pil":
+                frames = render_frames(scene.sketch_path, self._motion(scene), duration, self.fps, master_size)
+                self._run_piped(out, frames)
+            else:
+                self._run(out)
+            return paths
+        except ffmpeg.Error as e:
+            print(f"FFmpeg Error: {e.stderr.decode() if e.stderr else str(e)}")
+            raise e
+
+    def render_project(self, scenes: List[Scene]) -> str:
+        """
+        Single-pass render: one ffmpeg process and one filter graph for the whole video.
+
+        Per-scene motion segments and overlays are laid out on one timeline and the
+        narration is normalised (44.1 kHz stereo, padded/trimmed to the segment length)
+        and joined with the concat filter, so there are no per-scene encoder start-ups,
+        no intermediate clips and no timestamp gaps at the joins.
+        """
+        if not scenes:
+            raise Exception("No scenes to render")
+
+        output_path = f"/tmp/final_{uuid.uuid4()}.mp4"
+        size = f'{self.output_width}x{self.output_height}'
+        out_size = (self.output_width, self.output_height)
+
+        # Whole frames per scene, so audio segments line up with video exactly
+        frame_counts = [max(1, int(round(self.scene_duration(s) * self.fps))) for s in scenes]
+
+        audios = []
+        for scene, n_frames in zip(scenes, frame_counts):
+            seconds = n_frames / self.fps
+            if scene.audio_path and os.path.exists(scene.audio_path):
+                audio = (
+                    ffmpeg.input(scene.audio_path)
+                    .filter('aformat', sample_rates=44100, channel_layouts='stereo')
+                    .filter('apad')
+                    .filter('atrim', duration=seconds)
+                    .filter('asetpts', 'PTS-STARTPTS')
+                )
+            else:
+                audio = ffmpeg.input('anullsrc=r=44100:cl=stereo', f='lavfi', t=seconds)
+            audios.append(audio)
+
+        if self.motion_backend == "pil":
+            # One continuous piped stream; overlays are switched on per scene window
+            video = ffmpeg.input('pipe:', format='rawvideo', pix_fmt='rgb24', s=size, framerate=self.fps)
+            start = 0
+            for scene, n_frames in zip(scenes, frame_counts):
+                end = start + n_frames
+                video = self._overlay_text(
+                    video, scene.text, enable=f"between(n,{start},{end - 1})"
+                )
+                start = end
+            audio = ffmpeg.concat(*audios, v=0, a=1)
+        else:
+            segments = []
+            for scene, n_frames, audio in zip(scenes, frame_counts, audios):
+                segment = self._zoompan(scene, n_frames, out_size)
+                segments += [self._overlay_text(segment, scene.text), audio]
+            joined = ffmpeg.concat(*segments, v=1, a=1).node
+            video, audio = joined[0], joined[1]
+
+        try:
+            out = ffmpeg.output(
+                video,
+                audio,
+                output_path,
+                vcodec='libx264',
+                acodec='aac',
+                pix_fmt='yuv420p',
+                r=self.fps,
+                preset=self.preset,
+                crf=self.crf,
+                g=self.gop,
+                threads=self.threads,
+            )
+            if self.motion_backend == "pil":
+                frames = (
+                    frame
+                    for scene, n_frames in zip(scenes, frame_counts)
+                    for frame in render_frames(scene.sketch_path, self._motion(scene), n_frames / self.fps, self.fps, out_size)
+                )
+                self._run_piped(out, frames)
+            else:
+                self._run(out)
+            return output_path
+        except ffmpeg.Error as e:
+            print(f"FFmpeg Error: {e.stderr.decode() if e.stderr else str(e)}")
+            raise e
+
+    def _run(self, out):
+        """Run an ffmpeg command; stops early if the render job is cancelled."""
+        process = out.global_args('-loglevel', 'error').run_async(
+            pipe_stderr=True, overwrite_output=True
+        )
+        if wait_cancellable(process) != 0:
+            raise ffmpeg.Error('ffmpeg', None, process.stderr.read())
+
+    def _run_piped(self, out, frames):
+        """Run an ffmpeg command whose video input is raw frames on stdin."""
+        process = out.global_args('-loglevel', 'error').run_async(
+            pipe_stdin=True, pipe_stderr=True, overwrite_output=True
+        )
+        try:
+            for i, frame in enumerate(frames):
+                if i % self.fps == 0 and cancel_requested():
+                    process.kill()
+                    process.wait()
+                    raise RenderCancelled()
+                process.stdin.write(frame)
+        except BrokenPipeError:
+            pass # ffmpeg exited early; its stderr says why
+        finally:
+            process.stdin.close()
+        stderr = process.stderr.read()
+        if wait_cancellable(process) != 0:
+            raise ffmpeg.Error('ffmpeg', None, stderr)
+
     def concat_scenes(self, scene_paths: List[str]) -> str:
         """Concatenate multiple scene .mp4 files into final video."""
         
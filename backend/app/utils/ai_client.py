@@ -0,0 +1,126 @@
+import os
+import asyncio
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+from app import config
+from app.utils.llm_cache import LLMCache
+
+# Shared by every generator so identical prompts hit regardless of caller
+llm_cache = LLMCache()
+
+_openai_client: Optional[AsyncOpenAI] = None
+
+
+def get_openai_client() -> AsyncOpenAI:
+    """
+    Process-wide AsyncOpenAI client.
+    One pooled HTTP client with keep-alive is shared by every generator and the TTS engine.
+    """
+    global _openai_client
+    if _openai_client is None:
+        http_client = DefaultAsyncHttpxClient(
+            limits=httpx.Limits(
+                max_connections=config.OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=config.OPENAI_MAX_KEEPALIVE,
+                keepalive_expiry=config.OPENAI_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(config.OPENAI_TIMEOUT, connect=10.0),
+        )
+        _openai_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), http_client=http_client)
+    return _openai_client
+
+
+async def chat_completion(
+    client,
+    model: str,
+    messages: List[Dict],
+    temperature: float,
+    response_format: Optional[Dict] = None,
+    use_cache: bool = True,
+    parse: Optional[Callable[[str], Any]] = None,
+) -> Any:
+    """
+    Run a chat completion and return the message content, or parse(content) if given.
+    Responses are served from / written to the shared LLM cache unless use_cache is False
+    (fresh output is still written back, so later cached calls see the newest answer).
+    With parse, a response is only cached once it parses, so a truncated or malformed
+    reply is never replayed; parse errors propagate to the caller.
+    """
+    key = LLMCache.make_key(model, messages, temperature, response_format)
+
+    if use_cache:
+        cached = await asyncio.to_thread(llm_cache.get, key)
+        if cached is not None:
+            if not parse:
+                return cached
+            try:
+                return parse(cached)
+            except Exception as e:
+                print(f"Discarding unparseable cached LLM response: {e}")
+
+    kwargs = {"response_format": response_format} if response_format else {}
+    response = await (client or get_openai_client()).chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=temperature,
+        **kwargs
+    )
+
+    content = response.choices[0].message.content
+    result = parse(content) if parse else content
+    await asyncio.to_thread(llm_cache.set, key, content)
+    return result
+
+
+async def stream_chat_completion(
+    client,
+    model: str,
+    messages: List[Dict],
+    temperature: float,
+    response_format: Optional[Dict] = None,
+    use_cache: bool = True,
+    validate: Optional[Callable[[str], Any]] = None,
+) -> AsyncIterator[str]:
+    """
+    Streaming variant of chat_completion: yields content deltas as they arrive.
+    A cache hit yields the whole cached response as a single delta; a completed stream
+    is written back to the cache under the same key as the non-streaming call, only if
+    validate(full response) doesn't raise.
+    """
+    key = LLMCache.make_key(model, messages, temperature, response_format)
+
+    if use_cache:
+        cached = await asyncio.to_thread(llm_cache.get, key)
+        if cached is not None:
+            yield cached
+            return
+
+    kwargs = {"response_format": response_format} if response_format else {}
+    stream = await (client or get_openai_client()).chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=temperature,
+        stream=True,
+        **kwargs
+    )
+
+    parts = []
+    async for event in stream:
+        if not event.choices:
+            continue
+        delta = event.choices[0].delta.content
+        if delta:
+            parts.append(delta)
+            yield delta
+
+    content = "".join(parts)
+    if validate:
+        try:
+            validate(content)
+        except Exception as e:
+            print(f"Not caching unparseable streamed LLM response: {e}")
+            return
+    await asyncio.to_thread(llm_cache.set, key, content)
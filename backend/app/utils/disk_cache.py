@@ -0,0 +1,103 @@
+import os
+import shutil
+import threading
+import uuid
+from typing import Optional
+
+
+class DiskLRUCache:
+    """
+    Content-addressed files in a local directory, bounded by total size.
+    Recency is tracked with file mtimes, so the LRU order survives restarts.
+    """
+
+    def __init__(self, root: str, max_bytes: int, suffix: str = ""):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}{self.suffix}")
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached file path and mark it recently used, or None."""
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def checkout(self, key: str, dest_path: str) -> Optional[str]:
+        """
+        Materialise a cached file at dest_path (hard link where possible, else a copy)
+        and return dest_path, or None on a miss. The caller owns dest_path, so a later
+        eviction can't pull the file out from under it.
+        """
+        path = self.get(key)
+        if not path:
+            return None
+        try:
+            os.link(path, dest_path)
+        except FileNotFoundError:
+            return None # Evicted in between
+        except OSError:
+            shutil.copyfile(path, dest_path)
+        return dest_path
+
+    def put_bytes(self, key: str, data: bytes) -> str:
+        tmp_path = self._tmp_path()
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        return self._commit(tmp_path, key)
+
+    def put_file(self, key: str, src_path: str, move: bool = False) -> str:
+        """Copy (or move) a file into the cache and return its cached path."""
+        tmp_path = self._tmp_path()
+        if move:
+            shutil.move(src_path, tmp_path)
+        else:
+            shutil.copyfile(src_path, tmp_path)
+        return self._commit(tmp_path, key)
+
+    def delete(self, key: str):
+        try:
+            os.remove(self.path_for(key))
+        except FileNotFoundError:
+            pass
+
+    def _tmp_path(self) -> str:
+        return os.path.join(self.root, f".tmp_{uuid.uuid4()}")
+
+    def _commit(self, tmp_path: str, key: str) -> str:
+        path = self.path_for(key)
+        # Atomic rename so readers never see a partial file
+        os.replace(tmp_path, path)
+        self._evict()
+        return path
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.root):
+                if entry.name.startswith(".tmp_") or not entry.is_file():
+                    continue
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+
+            if total <= self.max_bytes:
+                return
+
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except FileNotFoundError:
+                    pass
@@ -0,0 +1,47 @@
+import os
+import subprocess
+from typing import Optional
+
+import ffmpeg
+
+
+def probe_duration(path: str) -> Optional[float]:
+    """Duration of a media file in seconds (ffprobe), or None if it can't be read."""
+    try:
+        probe = ffmpeg.probe(path)
+        return float(probe["format"]["duration"])
+    except Exception as e:
+        print(f"Error probing {path}: {e}")
+        return None
+
+
+# -------------------------------------------------------------
+# Cooperative cancellation (render pool workers)
+# -------------------------------------------------------------
+class RenderCancelled(Exception):
+    pass
+
+
+# Set per job by the render scheduler; the job is cancelled once this file exists
+_cancel_path: Optional[str] = None
+
+
+def set_cancel_path(path: Optional[str]):
+    global _cancel_path
+    _cancel_path = path
+
+
+def cancel_requested() -> bool:
+    return bool(_cancel_path) and os.path.exists(_cancel_path)
+
+
+def wait_cancellable(process, poll: float = 0.5) -> int:
+    """Wait for an ffmpeg process, killing it if the current job is cancelled."""
+    while True:
+        try:
+            return process.wait(timeout=poll)
+        except subprocess.TimeoutExpired:
+            if cancel_requested():
+                process.kill()
+                process.wait()
+                raise RenderCancelled()
@@ -0,0 +1,22 @@
+from typing import Optional
+
+import httpx
+
+from app import config
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Process-wide pooled async HTTP client for downloads and storage calls."""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=config.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=config.HTTP_MAX_KEEPALIVE,
+            ),
+            timeout=httpx.Timeout(config.HTTP_TIMEOUT, connect=10.0),
+            follow_redirects=True,
+        )
+    return _http_client
@@ -0,0 +1,84 @@
+import re
+import json
+from typing import Dict, List
+
+
+class JSONArrayStreamParser:
+    """
+    Incrementally extracts the objects of one top-level array (e.g. "scenes") from a
+    JSON document that arrives in arbitrary text fragments.
+
+        parser = JSONArrayStreamParser("scenes")
+        for delta in stream:
+            for obj in parser.feed(delta):
+                ...
+
+    Each object is yielded as soon as its closing brace arrives.
+    """
+
+    def __init__(self, key: str):
+        self._start_re = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+        self._buf = ""
+        self._pos = 0            # next index of _buf to scan
+        self._in_array = False
+        self._done = False
+        self._depth = 0          # brace/bracket depth inside the array
+        self._in_string = False
+        self._escape = False
+        self._obj_start = None
+
+    @property
+    def done(self) -> bool:
+        return self._done
+
+    def feed(self, text: str) -> List[Dict]:
+        if self._done:
+            return []
+
+        self._buf += text
+        out = []
+
+        if not self._in_array:
+            match = self._start_re.search(self._buf)
+            if not match:
+                return out
+            self._in_array = True
+            self._buf = self._buf[match.end():]
+            self._pos = 0
+
+        buf = self._buf
+        i = self._pos
+        while i < len(buf):
+            ch = buf[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                if self._depth == 0 and ch == "{":
+                    self._obj_start = i
+                self._depth += 1
+            elif ch in "}]":
+                if self._depth == 0:
+                    # End of the array itself
+                    self._done = True
+                    break
+                self._depth -= 1
+                if self._depth == 0 and ch == "}" and self._obj_start is not None:
+                    out.append(json.loads(buf[self._obj_start:i + 1]))
+                    self._obj_start = None
+            i += 1
+
+        # Drop everything that can no longer be part of a pending object
+        keep_from = self._obj_start if self._obj_start is not None else i
+        self._buf = buf[keep_from:]
+        self._pos = i - keep_from
+        if self._obj_start is not None:
+            self._obj_start = 0
+        return out
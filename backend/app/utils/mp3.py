@@ -0,0 +1,123 @@
+import struct
+from typing import Optional, Tuple
+
+# Bitrates in kbps, indexed by [version is MPEG-1][layer][bitrate index]
+_BITRATES = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+
+# Sample rates indexed by version bits (0 = MPEG-2.5, 2 = MPEG-2, 3 = MPEG-1)
+_SAMPLE_RATES = {
+    0: (11025, 12000, 8000),
+    2: (22050, 24000, 16000),
+    3: (44100, 48000, 32000),
+}
+
+_LAYERS = {1: 3, 2: 2, 3: 1}  # layer bits -> layer number
+
+
+def _parse_header(header: int) -> Optional[Tuple[int, int, int, bool, bool]]:
+    """
+    Decode a 4-byte frame header.
+    Returns (frame_length, samples_per_frame, sample_rate, is_mpeg1, is_mono) or None.
+    """
+    if header >> 21 != 0x7FF:
+        return None
+
+    version_bits = (header >> 19) & 0x3
+    layer_bits = (header >> 17) & 0x3
+    bitrate_index = (header >> 12) & 0xF
+    rate_index = (header >> 10) & 0x3
+    padding = (header >> 9) & 0x1
+    mono = ((header >> 6) & 0x3) == 3
+
+    if version_bits == 1 or layer_bits == 0 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    mpeg1 = version_bits == 3
+    layer = _LAYERS[layer_bits]
+    bitrate = _BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version_bits][rate_index]
+
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 3 and not mpeg1:
+        samples = 576
+        length = 72 * bitrate // sample_rate + padding
+    else:
+        samples = 1152
+        length = 144 * bitrate // sample_rate + padding
+
+    return length, samples, sample_rate, mpeg1, mono
+
+
+def _skip_id3v2(data: bytes) -> int:
+    if len(data) >= 10 and data[:3] == b"ID3":
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        footer = 10 if data[5] & 0x10 else 0
+        return 10 + size + footer
+    return 0
+
+
+def mp3_duration_bytes(data: bytes) -> Optional[float]:
+    """
+    Duration of an MP3 in seconds, from its frame headers.
+
+    Uses the Xing/Info frame count when present (VBR and LAME CBR files), otherwise
+    walks every frame header and sums samples / sample rate. Returns None when no
+    valid frames are found.
+    """
+    pos = _skip_id3v2(data)
+    end = len(data)
+    if end >= 128 and data[-128:-125] == b"TAG":
+        end -= 128
+
+    total = 0.0
+    frames = 0
+    first = True
+    while pos + 4 <= end:
+        parsed = _parse_header(struct.unpack_from(">I", data, pos)[0])
+        if not parsed or parsed[0] < 4:
+            # Lost sync (junk or a truncated frame): scan forward for the next header
+            pos += 1
+            continue
+
+        length, samples, sample_rate, mpeg1, mono = parsed
+
+        if first:
+            first = False
+            # Xing/Info header sits right after the side info of the first frame
+            side_info = (17 if mono else 32) if mpeg1 else (9 if mono else 17)
+            tag = pos + 4 + side_info
+            if data[tag:tag + 4] in (b"Xing", b"Info") and tag + 12 <= end:
+                flags = struct.unpack_from(">I", data, tag + 4)[0]
+                if flags & 0x1:
+                    frame_count = struct.unpack_from(">I", data, tag + 8)[0]
+                    return frame_count * samples / sample_rate
+                # Tag frame carries no audio
+                pos += length
+                continue
+
+        if pos + length > end and frames:
+            break # Truncated final frame
+        total += samples / sample_rate
+        frames += 1
+        pos += length
+
+    return total if frames else None
+
+
+def mp3_duration(path: str) -> Optional[float]:
+    """Duration of an MP3 file in seconds, computed in-process (no ffprobe)."""
+    try:
+        with open(path, "rb") as f:
+            return mp3_duration_bytes(f.read())
+    except OSError as e:
+        print(f"Error reading {path}: {e}")
+        return None
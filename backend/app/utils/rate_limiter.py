@@ -0,0 +1,166 @@
+import time
+import asyncio
+from typing import Dict, Optional
+
+# Atomically reserve the next send slot: returns the slot time (seconds, server clock)
+# and advances the shared "next free" marker by 1/rate.
+_RESERVE_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local rate = tonumber(redis.call('GET', KEYS[2]) or ARGV[1])
+local nxt = tonumber(redis.call('GET', KEYS[1]) or '0')
+local slot = math.max(now, nxt)
+redis.call('SET', KEYS[1], tostring(slot + 1 / rate), 'EX', 3600)
+return {tostring(slot), tostring(now)}
+"""
+
+
+class AdaptiveRateLimiter:
+    """
+    Process-wide token bucket whose rate adapts AIMD-style:
+    - on_success(): additive increase (rate += step, up to max_rate)
+    - on_throttle(): multiplicative decrease (rate *= decrease_factor, down to min_rate),
+      plus an optional hard pause when the provider sends a retry-after hint.
+
+    acquire() queues callers FIFO on the event loop instead of sleeping threads.
+    With a redis_url, the send schedule and learned rate are shared across processes.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial_rate: float,
+        min_rate: float,
+        max_rate: float,
+        increase_step: float,
+        decrease_factor: float = 0.5,
+        burst: float = 1.0,
+        redis_url: Optional[str] = None,
+    ):
+        self.name = name
+        self.rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.burst = burst
+
+        self._tokens = burst
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()   # FIFO: waiters are served in arrival order
+
+        self._redis = None
+        if redis_url:
+            import redis.asyncio as aioredis
+            self._redis = aioredis.from_url(redis_url)
+            self._reserve = self._redis.register_script(_RESERVE_LUA)
+
+        # Metrics
+        self.waiting = 0
+        self.acquired = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.last_wait = 0.0
+
+    # -------------------------------------------------------------
+    # Acquire
+    # -------------------------------------------------------------
+    async def acquire(self):
+        """Wait for a send slot."""
+        self.waiting += 1
+        start = time.monotonic()
+        try:
+            if self._redis:
+                try:
+                    await self._acquire_redis()
+                except Exception as e:
+                    print(f"[{self.name}] Redis limiter unavailable ({e}), using local bucket")
+                    await self._acquire_local()
+            else:
+                await self._acquire_local()
+        finally:
+            self.waiting -= 1
+
+        waited = time.monotonic() - start
+        self.acquired += 1
+        self.total_wait += waited
+        self.last_wait = waited
+        self.max_wait = max(self.max_wait, waited)
+
+    async def _acquire_local(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    async def _acquire_redis(self):
+        slot, now = await self._reserve(
+            keys=[f"ratelimit:{self.name}:next", f"ratelimit:{self.name}:rate"],
+            args=[self.rate],
+        )
+        delay = float(slot) - float(now)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _refill(self, now: float):
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+
+    # -------------------------------------------------------------
+    # Feedback
+    # -------------------------------------------------------------
+    def on_success(self):
+        self.rate = min(self.max_rate, self.rate + self.increase_step)
+        self._publish_rate()
+
+    def on_throttle(self, retry_after: Optional[float] = None):
+        """Provider returned 429: back off and drain the bucket."""
+        self.throttled += 1
+        self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+        self._tokens = 0.0
+        if retry_after:
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+        print(f"[{self.name}] Throttled, rate now {self.rate:.3f} req/s")
+        self._publish_rate(retry_after)
+
+    def _publish_rate(self, retry_after: Optional[float] = None):
+        if not self._redis:
+            return
+
+        async def publish():
+            try:
+                await self._redis.set(f"ratelimit:{self.name}:rate", self.rate, ex=3600)
+                if retry_after:
+                    # Push the shared schedule out so other processes pause too
+                    resume = time.time() + retry_after
+                    await self._redis.set(f"ratelimit:{self.name}:next", resume, ex=3600)
+            except Exception as e:
+                print(f"[{self.name}] Failed to publish rate: {e}")
+
+        try:
+            asyncio.get_running_loop().create_task(publish())
+        except RuntimeError:
+            pass
+
+    def metrics(self) -> Dict:
+        return {
+            "backend": "redis" if self._redis else "local",
+            "rate_per_second": round(self.rate, 4),
+            "queue_depth": self.waiting,
+            "acquired": self.acquired,
+            "throttled": self.throttled,
+            "avg_wait_seconds": self.total_wait / self.acquired if self.acquired else 0.0,
+            "max_wait_seconds": self.max_wait,
+            "last_wait_seconds": self.last_wait,
+        }
@@ -0,0 +1,44 @@
+import os
+import hashlib
+import aiofiles
+from fastapi import HTTPException, UploadFile
+
+from app import config
+
+
+async def spool_upload(
+    file: UploadFile,
+    dest_path: str,
+    max_bytes: int = config.MAX_UPLOAD_BYTES,
+    chunk_size: int = config.UPLOAD_CHUNK_SIZE,
+) -> str:
+    """
+    Stream an upload to dest_path in fixed-size chunks, hashing as it goes.
+    Only one chunk is held in memory at a time. Returns the SHA-256 hex digest.
+    Raises 413 (and removes the partial file) if the upload exceeds max_bytes.
+    """
+    h = hashlib.sha256()
+    size = 0
+
+    try:
+        async with aiofiles.open(dest_path, "wb") as f:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"Upload exceeds {max_bytes // (1024 * 1024)} MB limit"
+                    )
+
+                h.update(chunk)
+                await f.write(chunk)
+    except BaseException:
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        raise
+
+    return h.hexdigest()
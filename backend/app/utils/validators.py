@@ -0,0 +1,81 @@
+from typing import Dict
+
+ACCENT_COLORS = {"blue", "red", "green", "yellow"}
+
+# Narration pace used to estimate scene length when the model omits it
+WORDS_PER_SECOND = 2.5
+MIN_SCENE_SECONDS = 3
+MAX_SCENE_SECONDS = 12
+
+
+def _as_number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def fill_scene(scene: Dict, index: int) -> Dict:
+    """
+    Pass-through for the two_pass pipeline: the model's scene is kept as-is (values,
+    extra keys) and only fields that are missing get a default. A missing duration is
+    left to the scene composer's default, as before.
+    """
+    filled = dict(scene)
+    defaults = normalize_scene(scene, index, clamp=False)
+    for field, value in defaults.items():
+        if field != "duration_seconds" and filled.get(field) is None:
+            filled[field] = value
+    return filled
+
+
+def normalize_scene(scene: Dict, index: int, clamp: bool = True) -> Dict:
+    """
+    Coerce a scene from either the script schema or the storyboard schema into the
+    final storyboard schema, filling any missing fields. Used by the fused pipeline,
+    whose single call has no script pass to fall back on: unknown accents and keys
+    are dropped and (with clamp) the duration is kept within MIN/MAX_SCENE_SECONDS.
+    """
+    narration = str(scene.get("narration") or "").strip()
+    text_overlay = str(scene.get("text_overlay") or "").strip()
+    visual_prompt = str(scene.get("visual_prompt") or "").strip() or text_overlay or narration
+
+    accents = scene.get("accents") or []
+    if isinstance(accents, str):
+        accents = [accents]
+    accents = [str(a).lower() for a in accents if str(a).lower() in ACCENT_COLORS]
+
+    duration = _as_number(scene.get("duration_seconds"))
+    if duration is None:
+        duration = _as_number(scene.get("estimated_duration"))
+    if duration is None:
+        duration = len(narration.split()) / WORDS_PER_SECOND
+    if clamp:
+        duration = min(max(duration, MIN_SCENE_SECONDS), MAX_SCENE_SECONDS)
+
+    return {
+        "id": scene.get("id") or index + 1,
+        "narration": narration,
+        "visual_prompt": visual_prompt or "a blank sketchbook page",
+        "text_overlay": text_overlay,
+        "accents": accents,
+        "duration_seconds": duration,
+    }
+
+
+def normalize_storyboard(storyboard: Dict, strict: bool = True) -> Dict:
+    """
+    Validate a storyboard dict and fill missing fields on every scene.
+    strict normalises every scene (fused mode); otherwise scenes pass through with
+    only their missing fields filled (two_pass mode, see fill_scene).
+    """
+    scenes = storyboard.get("scenes")
+    if not isinstance(scenes, list) or not scenes:
+        raise ValueError("Storyboard has no scenes")
+
+    scene_fn = normalize_scene if strict else fill_scene
+    normalized = [scene_fn(s, i) for i, s in enumerate(scenes) if isinstance(s, dict)]
+    if strict:
+        return {"title": str(storyboard.get("title") or "Untitled"), "scenes": normalized}
+    # two_pass: keep the model's other top-level keys too
+    return {**storyboard, "title": storyboard.get("title") or "Untitled", "scenes": normalized}
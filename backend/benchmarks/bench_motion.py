@@ -0,0 +1,85 @@
+"""
+Per-motion encode fps: pil motion backend vs zoompan (fixed and legacy).
+
+Usage (from backend/):
+    python -m benchmarks.bench_motion --seconds 6
+
+Each motion is rendered as one silent scene clip with the production VideoRenderer
+settings (1280x720, 25 fps, libx264 ultrafast). "legacy" is the original looped-input
+zoompan graph, for reference. Needs ffmpeg on PATH.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import ffmpeg
+from PIL import Image, ImageDraw
+
+from app.services.motion import MOTIONS
+from app.services.scene_model import Scene
+from app.services.video_renderer import VideoRenderer
+
+
+def make_sketch(path: str):
+    img = Image.new("RGB", (1024, 768), "white")
+    draw = ImageDraw.Draw(img)
+    for i in range(0, 1024, 48):
+        draw.line((i, 0, 1024 - i, 768), fill=(20, 20, 20), width=5)
+    draw.ellipse((300, 200, 700, 560), outline=(40, 90, 220), width=8)
+    img.save(path)
+
+
+def legacy_render(sketch_path: str, duration: float, output_path: str):
+    """The original zoompan graph (zoom in, centred)."""
+    video = ffmpeg.input(sketch_path, loop=1, t=duration).filter(
+        'zoompan',
+        z="min(zoom+0.0015,1.5)",
+        d=int(duration * 25),
+        x="iw/2-(iw/zoom/2)",
+        y="ih/2-(ih/zoom/2)",
+        s='1280x720',
+    )
+    audio = ffmpeg.input('anullsrc', f='lavfi', t=duration)
+    ffmpeg.output(
+        video, audio, output_path,
+        vcodec='libx264', acodec='aac', pix_fmt='yuv420p', r=25, preset='ultrafast', shortest=None,
+    ).run(overwrite_output=True, quiet=True)
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=6.0)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    sketch_path = os.path.join(workdir, "sketch.png")
+    make_sketch(sketch_path)
+
+    frames = int(round(args.seconds * 25))
+    renderers = {name: VideoRenderer(motion_backend=name) for name in ("pil", "zoompan")}
+
+    legacy_out = os.path.join(workdir, "legacy.mp4")
+    legacy = timed(lambda: legacy_render(sketch_path, args.seconds, legacy_out))
+    os.remove(legacy_out)
+    print(f"legacy zoompan (zoom in): {frames / legacy:7.1f} fps")
+
+    print(f"{'motion':<10} {'pil fps':>9} {'zoompan fps':>12} {'speedup':>8}")
+    for motion in MOTIONS:
+        scene = Scene(sketch_path=sketch_path, text="", duration=args.seconds, motion=motion)
+        fps = {}
+        for name, renderer in renderers.items():
+            out = []
+            fps[name] = frames / timed(lambda: out.append(renderer.render_scene(scene)))
+            os.remove(out[0])
+        print(f"{motion:<10} {fps['pil']:9.1f} {fps['zoompan']:12.1f} {fps['pil'] / fps['zoompan']:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Multi-aspect rendering: one graph for all aspects vs one render per aspect.
+
+Usage (from backend/):
+    python -m benchmarks.bench_multi_aspect --scenes 5 --repeat 3
+
+Each scene is rendered into landscape, vertical and square clips, either with a
+single render_scene_multi call (sketch decoded and motion computed once, split
+into three encoders) or with three sequential single-aspect calls. Needs ffmpeg on PATH.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from app import config
+from app.services.motion import motion_for_scene
+from app.services.scene_model import Scene
+from app.services.video_renderer import VideoRenderer
+from app.utils.mp3 import mp3_duration
+from benchmarks.bench_render_modes import make_assets
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenes", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--backend", choices=config.MOTION_BACKENDS, default=config.MOTION_BACKEND)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    sketch_path, audio_path = make_assets(workdir)
+    audio_duration = mp3_duration(audio_path)
+    scenes = [
+        Scene(
+            sketch_path=sketch_path,
+            text=f"Scene {i + 1}",
+            duration=4,
+            motion=motion_for_scene(i),
+            audio_path=audio_path,
+            audio_duration=audio_duration,
+        )
+        for i in range(args.scenes)
+    ]
+    aspects = list(config.OUTPUT_ASPECTS)
+    renderer = VideoRenderer(motion_backend=args.backend, threads=config.RENDER_THREADS_PER_ENCODE)
+    print(f"{args.scenes} scenes x {aspects}, backend={renderer.motion_backend}")
+
+    def run(per_call):
+        best = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            paths = []
+            for scene in scenes:
+                for group in per_call:
+                    paths.extend(renderer.render_scene_multi(scene, group).values())
+            elapsed = time.perf_counter() - start
+            for path in paths:
+                os.remove(path)
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    sequential = run([[aspect] for aspect in aspects])
+    single_graph = run([aspects])
+    print(f"sequential   {sequential:7.2f}s")
+    print(f"single graph {single_graph:7.2f}s   ({sequential / single_graph:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Outline map-reduce speedup with a fake LLM client that injects latency.
+
+Usage (from backend/):
+    python -m benchmarks.bench_outline_concurrency --chunks 40 --latency 0.2
+
+Concurrency 1 should take ~chunks * latency; concurrency N should take
+~ceil(chunks / N) * latency.
+"""
+import argparse
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+from app.services.outline_generator import OutlineGenerator
+
+
+class FakeCompletions:
+    def __init__(self, latency: float, fail_every: int = 0):
+        self.latency = latency
+        self.fail_every = fail_every
+        self.calls = 0
+
+    async def create(self, model, messages, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if self.fail_every and self.calls % self.fail_every == 0:
+            raise Exception("injected failure")
+
+        user = messages[-1]["content"]
+        if user.startswith("Topics:"):
+            body = {"order": []}
+        else:
+            # Echo the chunk marker back so ordering can be checked
+            marker = user.rsplit("\n", 1)[-1]
+            body = {
+                "topics": [marker],
+                "subtopics": {marker: [f"{marker} detail"]},
+                "key_concepts": [f"{marker} concept"],
+                "definitions": {},
+            }
+        message = SimpleNamespace(content=json.dumps(body))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+class FakeClient:
+    def __init__(self, latency: float, fail_every: int = 0):
+        self.chat = SimpleNamespace(completions=FakeCompletions(latency, fail_every))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--fail-every", type=int, default=0, help="inject a failure every N calls")
+    args = parser.parse_args()
+
+    chunks = [f"chunk-{i:03d}" for i in range(args.chunks)]
+
+    gen = OutlineGenerator(FakeClient(args.latency))
+    start = time.perf_counter()
+    sequential = asyncio.run(gen.generate_outline_async(chunks, concurrency=1, use_cache=False))
+    base = time.perf_counter() - start
+    print(f"sequential        : {base:6.2f}s")
+
+    for concurrency in (4, 8, 16):
+        gen = OutlineGenerator(FakeClient(args.latency, args.fail_every))
+        start = time.perf_counter()
+        outline = asyncio.run(gen.generate_outline_async(chunks, concurrency=concurrency, use_cache=False))
+        elapsed = time.perf_counter() - start
+
+        assert outline["topics"] == sequential["topics"], "chunk order not preserved"
+        print(f"async x{concurrency:<3}         : {elapsed:6.2f}s  speedup {base / elapsed:4.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Micro-benchmark for outline merging: legacy list-membership merge vs OutlineMerger.
+
+Usage (from backend/):
+    python -m benchmarks.bench_outline_merge --chunks 5000
+"""
+import argparse
+import random
+import time
+
+from app.services.outline_merger import OutlineMerger
+
+
+def legacy_merge(outlines):
+    """The original OutlineGenerator._merge_outlines."""
+    merged = {"topics": [], "subtopics": {}, "key_concepts": [], "definitions": {}}
+    for o in outlines:
+        for t in o["topics"]:
+            if t not in merged["topics"]:
+                merged["topics"].append(t)
+        for topic, subs in o.get("subtopics", {}).items():
+            if topic not in merged["subtopics"]:
+                merged["subtopics"][topic] = []
+            for s in subs:
+                if s not in merged["subtopics"][topic]:
+                    merged["subtopics"][topic].append(s)
+        for k in o["key_concepts"]:
+            if k not in merged["key_concepts"]:
+                merged["key_concepts"].append(k)
+        for term, definition in o["definitions"].items():
+            if term not in merged["definitions"]:
+                merged["definitions"][term] = definition
+    return merged
+
+
+def vary(name: str, rng: random.Random) -> str:
+    """Spelling noise an LLM typically produces for the same entry."""
+    choice = rng.random()
+    if choice < 0.2:
+        return name.lower()
+    if choice < 0.3:
+        return name + " "
+    if choice < 0.4:
+        return name + "."
+    return name
+
+
+def synthetic_outlines(n_chunks: int, vocab: int, seed: int = 7):
+    rng = random.Random(seed)
+    topics = [f"Topic {i} Of Biology" for i in range(vocab)]
+    concepts = [f"Concept {i}" for i in range(vocab * 4)]
+    outlines = []
+    for _ in range(n_chunks):
+        picked = rng.sample(topics, 5)
+        outlines.append({
+            "topics": [vary(t, rng) for t in picked],
+            "subtopics": {vary(t, rng): [vary(f"{t} part {j}", rng) for j in range(4)] for t in picked},
+            "key_concepts": [vary(c, rng) for c in rng.sample(concepts, 10)],
+            "definitions": {vary(c, rng): f"definition of {c}" for c in rng.sample(concepts, 5)},
+        })
+    return outlines
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--vocab", type=int, default=2000)
+    args = parser.parse_args()
+
+    outlines = synthetic_outlines(args.chunks, args.vocab)
+
+    def merge_with(threshold):
+        merger = OutlineMerger(threshold)
+        for o in outlines:
+            merger.add(o)
+        return merger.result()
+
+    cases = [
+        ("legacy", lambda: legacy_merge(outlines)),
+        ("ordered sets", lambda: merge_with(None)),
+        ("ordered sets + fuzzy 0.9", lambda: merge_with(0.9)),
+    ]
+
+    print(f"{args.chunks} chunk outlines, vocab {args.vocab}")
+    for name, fn in cases:
+        merged, elapsed = timed(fn)
+        print(
+            f"{name:>26}: {elapsed * 1000:8.1f} ms  "
+            f"topics={len(merged['topics']):5d} concepts={len(merged['key_concepts']):5d}"
+        )
+
+
+if __name__ == "__main__":
+    main()
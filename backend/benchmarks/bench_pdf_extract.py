@@ -0,0 +1,116 @@
+"""
+Benchmark PDF extraction: legacy single-core path vs the streaming process-pool path.
+
+Usage (from backend/):
+    python -m benchmarks.bench_pdf_extract --pages 600
+
+Each path runs in a fresh process so peak RSS numbers don't bleed into each other.
+"""
+import argparse
+import multiprocessing as mp
+import os
+import resource
+import tempfile
+import time
+
+import PyPDF2
+
+from app.services.pdf_processor import PDFProcessor
+
+
+def write_synthetic_pdf(path: str, pages: int, lines_per_page: int = 45):
+    """Write a plain-text PDF with `pages` pages of filler prose."""
+    sentence = "The mitochondria converts glucose into ATP through cellular respiration"
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in below
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+
+    for p in range(pages):
+        ops = ["BT", "/F1 10 Tf", "12 TL", "50 780 Td"]
+        for line in range(lines_per_page):
+            ops.append(f"({sentence} page {p} line {line}.) '")
+        ops.append("ET")
+        stream = "\n".join(ops).encode()
+
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+
+    kids = " ".join(f"{i} 0 R" for i in page_ids).encode()
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % pages
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for i, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n" % i + body + b"\nendobj\n")
+
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for off in offsets:
+            f.write(b"%010d 00000 n \n" % off)
+        f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+
+
+def legacy_process(pdf_path: str):
+    """The original PDFProcessor.process_pdf, kept verbatim for comparison."""
+    text = ""
+    with open(pdf_path, "rb") as f:
+        reader = PyPDF2.PdfReader(f)
+        for page in reader.pages:
+            text += page.extract_text() + "\n"
+
+    processor = PDFProcessor()
+    cleaned = processor.clean_text(text)
+    sections = processor.detect_sections(cleaned)
+    chunks = processor.chunk_text(cleaned)
+    return {"full_text": cleaned, "sections": sections, "chunks": chunks}
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux; children covers the extraction pool
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return (own + children) / 1024
+
+
+def run_case(name: str, pdf_path: str, pages: int, queue):
+    start = time.perf_counter()
+    if name == "legacy":
+        out = legacy_process(pdf_path)
+    else:
+        out = PDFProcessor().process_pdf(pdf_path)
+    elapsed = time.perf_counter() - start
+    queue.put((name, pages / elapsed, peak_rss_mb(), len(out["chunks"])))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=600)
+    args = parser.parse_args()
+
+    ctx = mp.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = os.path.join(tmp, "synthetic.pdf")
+        write_synthetic_pdf(pdf_path, args.pages)
+        print(f"Synthetic PDF: {args.pages} pages, {os.path.getsize(pdf_path) / 1e6:.1f} MB")
+
+        for name in ("legacy", "streaming"):
+            queue = ctx.Queue()
+            proc = ctx.Process(target=run_case, args=(name, pdf_path, args.pages, queue))
+            proc.start()
+            case, pps, rss, n_chunks = queue.get()
+            proc.join()
+            print(f"{case:>10}: {pps:8.1f} pages/s  peak RSS {rss:7.1f} MB  ({n_chunks} chunks)")
+
+
+if __name__ == "__main__":
+    main()
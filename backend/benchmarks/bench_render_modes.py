@@ -0,0 +1,91 @@
+"""
+Per-scene (clip per scene + concat) vs single-pass whole-video rendering.
+
+Usage (from backend/):
+    python -m benchmarks.bench_render_modes --scenes 10 40 100
+
+Scenes use one synthetic sketch and a short generated MP3 narration, 4 s each.
+Per-scene renders run on a process pool with the RenderScheduler's default sizing
+(cpu_count // RENDER_THREADS_PER_ENCODE workers), then concat; single-pass is one
+encode with the same thread budget. Needs ffmpeg on PATH.
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import ffmpeg
+from PIL import Image, ImageDraw
+
+from app.services.motion import motion_for_scene
+from app.services.render_scheduler import RenderScheduler, render_scene_job
+from app.services.scene_model import Scene
+from app.services.video_renderer import VideoRenderer
+from app.utils.mp3 import mp3_duration
+
+
+def make_assets(workdir: str):
+    sketch_path = os.path.join(workdir, "sketch.png")
+    img = Image.new("RGB", (1024, 768), "white")
+    draw = ImageDraw.Draw(img)
+    for i in range(0, 1024, 48):
+        draw.line((i, 0, 1024 - i, 768), fill=(20, 20, 20), width=5)
+    img.save(sketch_path)
+
+    audio_path = os.path.join(workdir, "narration.mp3")
+    (
+        ffmpeg.input("sine=frequency=440:duration=3", f="lavfi")
+        .output(audio_path, acodec="libmp3lame", ar=24000, ac=1)
+        .run(overwrite_output=True, quiet=True)
+    )
+    return sketch_path, audio_path
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenes", type=int, nargs="+", default=[10, 40, 100])
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    sketch_path, audio_path = make_assets(workdir)
+    audio_duration = mp3_duration(audio_path)
+
+    scheduler = RenderScheduler()
+    renderer = VideoRenderer(threads=scheduler.threads_per_encode)
+    print(f"workers={scheduler.workers} threads/encode={scheduler.threads_per_encode} backend={renderer.motion_backend}")
+
+    with ProcessPoolExecutor(max_workers=scheduler.workers) as pool:
+        for n in args.scenes:
+            scenes = [
+                Scene(
+                    sketch_path=sketch_path,
+                    text=f"Scene {i + 1}",
+                    duration=4,
+                    motion=motion_for_scene(i),
+                    audio_path=audio_path,
+                    audio_duration=audio_duration,
+                )
+                for i in range(n)
+            ]
+
+            start = time.perf_counter()
+            clips = list(pool.map(render_scene_job, scenes, [scheduler.threads_per_encode] * n))
+            final = renderer.concat_scenes(clips)
+            per_scene = time.perf_counter() - start
+            for path in clips + [final]:
+                os.remove(path)
+
+            start = time.perf_counter()
+            final = renderer.render_project(scenes)
+            single_pass = time.perf_counter() - start
+            os.remove(final)
+
+            print(
+                f"{n:4d} scenes: per-scene {per_scene:7.2f}s   single-pass {single_pass:7.2f}s   "
+                f"({per_scene / single_pass:.2f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+SketchEngine.generate_batch throughput against a fake Replicate server.
+
+Usage (from backend/):
+    python -m benchmarks.bench_sketch_batch --latency 1.0
+
+The fake server implements prediction create/poll and serves a 1024x768 PNG, each
+prediction taking --latency seconds to "succeed". Storage uploads go to the local
+storage backend so only generation, download and postprocessing are measured.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import time
+import uuid
+
+# Fake endpoints / credentials, and a limiter that never gets in the way
+os.environ.setdefault("REPLICATE_API_TOKEN", "bench")
+os.environ.setdefault("STORAGE_BACKEND", "local")
+os.environ.setdefault("LOCAL_STORAGE_ROOT", "/tmp/scribbl_bench_storage")
+os.environ.setdefault("SKETCH_RATE_INITIAL", "10000")
+os.environ.setdefault("SKETCH_RATE_MAX", "10000")
+os.environ.setdefault("SKETCH_RATE_BURST", "10000")
+os.environ.setdefault("SKETCH_POLL_INTERVAL", "0.1")
+
+HOST, PORT = "127.0.0.1", 8765
+os.environ.setdefault("REPLICATE_BASE_URL", f"http://{HOST}:{PORT}")
+
+from PIL import Image, ImageDraw
+
+from app import config
+from app.services.sketch_engine import SketchEngine
+
+
+def make_png() -> bytes:
+    img = Image.new("RGB", (1024, 768), "white")
+    draw = ImageDraw.Draw(img)
+    for i in range(0, 1024, 64):
+        draw.line((i, 0, 1024 - i, 768), fill=(30, 30, 30), width=6)
+    out = io.BytesIO()
+    img.save(out, format="PNG")
+    return out.getvalue()
+
+
+class FakeReplicate:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.png = make_png()
+        self.created = {}
+
+    def prediction(self, pid: str) -> dict:
+        done = time.monotonic() - self.created[pid] >= self.latency
+        return {
+            "id": pid,
+            "model": "black-forest-labs/flux-schnell",
+            "version": "bench",
+            "status": "succeeded" if done else "processing",
+            "input": {},
+            "output": [f"{config.REPLICATE_BASE_URL}/files/{pid}.png"] if done else None,
+            "logs": "",
+            "error": None,
+            "metrics": {},
+            "created_at": None,
+            "started_at": None,
+            "completed_at": None,
+            "urls": {"get": f"{config.REPLICATE_BASE_URL}/v1/predictions/{pid}"},
+        }
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode().split(" ", 2)
+
+                length = 0
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b""):
+                        break
+                    name, _, value = line.decode().partition(":")
+                    if name.lower() == "content-length":
+                        length = int(value)
+                if length:
+                    await reader.readexactly(length)
+
+                if method == "POST" and path.endswith("/predictions"):
+                    pid = uuid.uuid4().hex
+                    self.created[pid] = time.monotonic()
+                    status, body, ctype = 201, json.dumps(self.prediction(pid)).encode(), "application/json"
+                elif method == "GET" and path.startswith("/v1/predictions/"):
+                    pid = path.rsplit("/", 1)[-1]
+                    status, body, ctype = 200, json.dumps(self.prediction(pid)).encode(), "application/json"
+                elif method == "GET" and path.startswith("/files/"):
+                    status, body, ctype = 200, self.png, "image/png"
+                else:
+                    status, body, ctype = 404, b"{}", "application/json"
+
+                writer.write(
+                    f"HTTP/1.1 {status} OK\r\nContent-Type: {ctype}\r\n"
+                    f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+                )
+                await writer.drain()
+        except (ConnectionResetError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def run(latency: float, sizes):
+    fake = FakeReplicate(latency)
+    server = await asyncio.start_server(fake.handle, HOST, PORT)
+
+    engine = SketchEngine()
+    async with server:
+        for n in sizes:
+            items = [{"description": f"a cell with a nucleus #{i}", "use_cache": False} for i in range(n)]
+            start = time.perf_counter()
+            results = await engine.generate_batch(items)
+            elapsed = time.perf_counter() - start
+            assert len(results) == n
+            for r in results:
+                os.remove(r["path"])
+            print(f"{n:4d} items: {elapsed:6.2f}s  {n / elapsed:6.2f} sketches/s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=1.0, help="seconds per fake prediction")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 200])
+    args = parser.parse_args()
+
+    print(f"concurrency={config.SKETCH_CONCURRENCY} postprocess workers={config.SKETCH_POSTPROCESS_WORKERS}")
+    asyncio.run(run(args.latency, args.sizes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Storage throughput: sequential sync calls vs concurrent async calls.
+
+Usage (from backend/):
+    python -m benchmarks.bench_storage --latency 50 --statuses 200 --files 8 --file-mb 16
+    STORAGE_BACKEND=supabase python -m benchmarks.bench_storage --bucket <bucket>
+
+With the default local backend every request sleeps --latency ms on the storage
+I/O loop to stand in for a network round trip, so the numbers show how much the
+pooled async API overlaps; against Supabase the latency is real.
+
+--check-upsert also verifies that upsert=False rejects an existing object on the
+streamed path and, with a --file-mb at or above STORAGE_MULTIPART_THRESHOLD and
+SUPABASE_S3_* keys set, on the S3 multipart path.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+
+os.environ.setdefault("STORAGE_BACKEND", "local")
+
+from app import config
+from app.services.storage import LocalStorageBackend, StorageManager
+
+
+def make_file(workdir: str, size_mb: int) -> str:
+    path = os.path.join(workdir, f"blob_{size_mb}mb.bin")
+    with open(path, "wb") as f:
+        for _ in range(size_mb):
+            f.write(os.urandom(1024 * 1024))
+    return path
+
+
+async def run_async(storage: StorageManager, prefix: str, statuses: int, blob_path: str, files: int):
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        storage.save_json_async(f"{prefix}/status_{i}.json", {"id": i, "status": "processing", "step": "rendering"})
+        for i in range(statuses)
+    ))
+    status_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        storage.upload_file_async(blob_path, f"{prefix}/blob_{i}.bin", upsert=True)
+        for i in range(files)
+    ))
+    return status_time, time.perf_counter() - start
+
+
+def check_upsert(storage: StorageManager, prefix: str, paths):
+    for path in paths:
+        size = os.path.getsize(path)
+        route = "multipart" if getattr(storage.backend, "uses_multipart", lambda _: False)(size) else "streamed"
+        dest = f"{prefix}/upsert_{os.path.basename(path)}"
+        storage.upload_file(path, dest)
+        try:
+            storage.upload_file(path, dest)
+        except Exception:
+            rejected = True
+        else:
+            rejected = False
+        storage.upload_file(path, dest, upsert=True)
+        print(f"upsert check   {size / 1024 / 1024:6.1f} MB {route:9s} overwrite rejected: {rejected}")
+        if not rejected:
+            raise SystemExit("upsert=False overwrote an existing object")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=50.0, help="simulated ms per request (local backend)")
+    parser.add_argument("--statuses", type=int, default=200)
+    parser.add_argument("--files", type=int, default=8)
+    parser.add_argument("--file-mb", type=int, default=16)
+    parser.add_argument("--bucket", default="sketchcourse")
+    parser.add_argument("--check-upsert", action="store_true")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    if config.STORAGE_BACKEND == "local":
+        backend = LocalStorageBackend(root=os.path.join(workdir, "storage"), latency=args.latency / 1000)
+    else:
+        backend = None
+    storage = StorageManager(args.bucket, backend=backend)
+    blob_path = make_file(workdir, args.file_mb)
+    prefix = f"bench/storage/{uuid.uuid4()}"
+    print(f"backend={config.STORAGE_BACKEND} statuses={args.statuses} files={args.files}x{args.file_mb}MB")
+
+    start = time.perf_counter()
+    for i in range(args.statuses):
+        storage.save_json(f"{prefix}/status_{i}.json", {"id": i, "status": "processing", "step": "rendering"})
+    seq_status = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(args.files):
+        storage.upload_file(blob_path, f"{prefix}/blob_{i}.bin", upsert=True)
+    seq_files = time.perf_counter() - start
+
+    async_status, async_files = asyncio.run(run_async(storage, prefix, args.statuses, blob_path, args.files))
+
+    total_mb = args.files * args.file_mb
+    print(f"status writes  sequential {args.statuses / seq_status:8.1f}/s   concurrent {args.statuses / async_status:8.1f}/s")
+    print(f"file uploads   sequential {total_mb / seq_files:8.1f} MB/s concurrent {total_mb / async_files:8.1f} MB/s")
+
+    if args.check_upsert:
+        small_path = os.path.join(workdir, "small.json")
+        with open(small_path, "w") as f:
+            f.write("{}")
+        check_upsert(storage, prefix, [small_path, blob_path])
+
+
+if __name__ == "__main__":
+    main()
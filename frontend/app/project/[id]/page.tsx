@@ -36,14 +36,33 @@ export default function ProjectPage() {
             return false;
         };
 
-        const interval = setInterval(async () => {
-            const stop = await poll();
-            if (stop) clearInterval(interval);
-        }, 2000);
+        let interval: ReturnType<typeof setInterval> | undefined;
+        const startPolling = () => {
+            interval = setInterval(async () => {
+                const stop = await poll();
+                if (stop) clearInterval(interval);
+            }, 2000);
+            poll(); // Initial call
+        };
 
-        poll(); // Initial call
+        // Prefer the pushed event stream; fall back to polling if it can't connect
+        const events = new EventSource(`/api/projects/${id}/events`);
+        events.onmessage = (e) => {
+            const data = JSON.parse(e.data);
+            setStatus(data);
+            if (data.status === "completed" || data.status === "failed") {
+                events.close();
+            }
+        };
+        events.onerror = () => {
+            events.close();
+            if (!interval) startPolling();
+        };
 
-        return () => clearInterval(interval);
+        return () => {
+            events.close();
+            if (interval) clearInterval(interval);
+        };
     }, [id]);
 
     return (